@@ -0,0 +1,19 @@
+"""Lazily built, process-wide pydantic TypeAdapters."""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any
+
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def get_adapter(tp: Any) -> TypeAdapter:
+    """Return the TypeAdapter for ``tp``, building its validator on first use only."""
+    return TypeAdapter(tp)
+
+
+@lru_cache(maxsize=None)
+def get_json_schema(tp: Any) -> dict:
+    """JSON schema for ``tp``, generated once on first request instead of at import."""
+    return get_adapter(tp).json_schema()
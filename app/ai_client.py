@@ -1,13 +1,97 @@
 """Local LLM client that runs fully on open-source models."""
 from __future__ import annotations
 
+import json
 import logging
 import os
+import queue
 import threading
-from typing import Any, Dict, List
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlsplit
 
 logger = logging.getLogger(__name__)
 
+_JSON_DECODER = json.JSONDecoder()
+# Every per-request prompt suffix starts with one of these role tags.
+_SEAM_PROBES = ("<|user|>\n", "<|assistant|>\n")
+
+
+@dataclass
+class _PendingChat:
+    prompt: Tuple[str, str]
+    max_tokens: int
+    json_mode: bool = False
+    future: Future = field(default_factory=Future)
+
+
+def _ollama_base_url(host: str) -> str:
+    """Normalise ``OLLAMA_HOST`` the way the ollama client does.
+
+    The server's docs use bare ``host:port`` values such as ``0.0.0.0:11434``; those get an
+    ``http://`` scheme (and port 11434 when none is given), and a wildcard bind address is
+    mapped to ``localhost`` so it can be connected to.
+    """
+    host = host.strip() or "localhost"
+    scheme, sep, rest = host.partition("://")
+    default_port = None
+    if not sep:
+        scheme, rest, default_port = "http", host, 11434
+    split = urlsplit(f"{scheme}://{rest}")
+    hostname = split.hostname or "localhost"
+    if hostname in {"0.0.0.0", "::"}:
+        hostname = "localhost"
+    elif ":" in hostname:
+        hostname = f"[{hostname}]"
+    port = split.port or default_port
+    netloc = f"{hostname}:{port}" if port else hostname
+    return f"{split.scheme}://{netloc}{split.path}".rstrip("/")
+
+
+class _JsonObjectStop:
+    """Stopping criterion that ends a row once its top-level JSON object closes.
+
+    JSON-mode prompts are prefilled with ``{``, so every such row starts one level deep.
+    """
+
+    def __init__(self, tokenizer, prompt_len: int, json_rows: List[bool]) -> None:
+        self.tokenizer = tokenizer
+        self.position = prompt_len
+        self.json_rows = json_rows
+        self.depth = [1] * len(json_rows)
+        self.in_string = [False] * len(json_rows)
+        self.escaped = [False] * len(json_rows)
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+
+        new_tokens = input_ids[:, self.position :].tolist()
+        self.position = input_ids.shape[1]
+        for row, tokens in enumerate(new_tokens):
+            if not self.json_rows[row] or self.depth[row] == 0:
+                continue
+            for char in self.tokenizer.decode(tokens):
+                if self.in_string[row]:
+                    if self.escaped[row]:
+                        self.escaped[row] = False
+                    elif char == "\\":
+                        self.escaped[row] = True
+                    elif char == '"':
+                        self.in_string[row] = False
+                elif char == '"':
+                    self.in_string[row] = True
+                elif char in "{[":
+                    self.depth[row] += 1
+                elif char in "}]":
+                    self.depth[row] -= 1
+                    if self.depth[row] == 0:
+                        break
+        done = [is_json and depth == 0 for is_json, depth in zip(self.json_rows, self.depth)]
+        return torch.tensor(done, device=input_ids.device)
+
 
 class LocalLLMClient:
     """Thin wrapper around a local Transformers or Ollama model."""
@@ -24,18 +108,29 @@ class LocalLLMClient:
         self.max_new_tokens = int(os.getenv("LLM_MAX_NEW_TOKENS", "768"))
         self.device_map = os.getenv("LLM_DEVICE_MAP", "auto")
         self.precision = os.getenv("LLM_PRECISION", "auto").lower()
-        self._pipeline = None
+        self.quantization = os.getenv("LLM_QUANTIZATION", "none").lower()
+        self.compile_model = os.getenv("LLM_COMPILE", "0").lower() in {"1", "true", "yes"}
+        self._model = None
+        self._tokenizer = None
         self._lock = threading.Lock()
+        self.batch_window_s = float(os.getenv("LLM_BATCH_WINDOW_MS", "50")) / 1000.0
+        self.max_batch_size = int(os.getenv("LLM_MAX_BATCH_SIZE", "8"))
+        self._pending: "queue.Queue[_PendingChat]" = queue.Queue()
+        self._batch_worker: threading.Thread | None = None
+        self.ollama_host = _ollama_base_url(os.getenv("OLLAMA_HOST", "http://localhost:11434"))
+        self.ollama_timeout = float(os.getenv("OLLAMA_TIMEOUT", "300"))
+        self._ollama_session = None
+        self._prefix_ids = lru_cache(maxsize=32)(self._encode_prefix)
 
     def _ensure_pipeline(self):
         if self.provider == "ollama":
             return
 
-        if self._pipeline is not None:
+        if self._model is not None:
             return
 
         try:
-            from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+            from transformers import AutoModelForCausalLM, AutoTokenizer
             import torch
         except ImportError as exc:  # pragma: no cover - runtime dependency
             raise RuntimeError(
@@ -43,79 +138,289 @@ class LocalLLMClient:
             ) from exc
 
         with self._lock:
-            if self._pipeline is not None:
+            if self._model is not None:
                 return
+            quantization_config = self._quantization_config(torch)
+            dtype = torch.bfloat16 if quantization_config is not None else self._resolve_dtype(torch)
+            if torch.cuda.is_available():
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.allow_tf32 = True
             logger.info(
-                "Loading local LLM model '%s' with provider transformers (device=%s precision=%s)",
+                "Loading local LLM model '%s' with provider transformers (device=%s precision=%s dtype=%s quantization=%s)",
                 self.model,
                 self.device_map,
                 self.precision,
+                dtype,
+                self.quantization,
             )
-            dtype = "auto"
-            if self.precision in {"fp16", "float16"}:
-                dtype = torch.float16
-            elif self.precision in {"bf16", "bfloat16"}:
-                dtype = torch.bfloat16
             tokenizer = AutoTokenizer.from_pretrained(self.model)
-            model = AutoModelForCausalLM.from_pretrained(
-                self.model,
-                device_map=self.device_map,
-                torch_dtype=dtype,
-            )
-            self._pipeline = pipeline(
-                "text-generation",
-                model=model,
-                tokenizer=tokenizer,
-            )
+            model = self._load_model(AutoModelForCausalLM, torch, dtype, quantization_config)
+            model.eval()
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            self._tokenizer = tokenizer
+            if self.compile_model:
+                # Compile the forward pass and trigger compilation now, not on the first request.
+                model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
+                warmup = tokenizer("warmup", return_tensors="pt").to(model.device)
+                with torch.inference_mode():
+                    model.generate(**warmup, max_new_tokens=1, pad_token_id=tokenizer.pad_token_id)
+            self._model = model
             torch.manual_seed(int(os.getenv("LLM_SEED", "42")))
 
-    def chat(self, messages: List[Dict[str, str]], *, max_tokens: int | None = None) -> str:
-        """Generate a completion for a chat-style prompt."""
-        max_tokens = max_tokens or self.max_new_tokens
-        prompt = self._format_messages(messages)
+    def _resolve_dtype(self, torch):
+        """Map `LLM_PRECISION` to a torch dtype; `auto` picks per hardware instead of the checkpoint default."""
+        if self.precision in {"fp16", "float16"}:
+            return torch.float16
+        if self.precision in {"bf16", "bfloat16"}:
+            return torch.bfloat16
+        if self.precision in {"fp32", "float32"}:
+            return torch.float32
+        if torch.cuda.is_available():
+            return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        # Half-precision kernels are slow on most CPUs; use fp32 across all cores.
+        torch.set_num_threads(os.cpu_count() or 1)
+        return torch.float32
+
+    def _load_model(self, auto_model, torch, dtype, quantization_config):
+        """Load with fused attention: FlashAttention-2 when installed on CUDA, else SDPA."""
+        implementations = ["flash_attention_2", "sdpa"] if torch.cuda.is_available() else ["sdpa"]
+        for attn_implementation in implementations:
+            try:
+                return auto_model.from_pretrained(
+                    self.model,
+                    device_map=self.device_map,
+                    torch_dtype=dtype,
+                    quantization_config=quantization_config,
+                    attn_implementation=attn_implementation,
+                )
+            except (ImportError, ValueError) as exc:
+                logger.info("Attention implementation '%s' unavailable (%s)", attn_implementation, exc)
+        return auto_model.from_pretrained(
+            self.model,
+            device_map=self.device_map,
+            torch_dtype=dtype,
+            quantization_config=quantization_config,
+        )
 
+    def _quantization_config(self, torch):
+        """Build a bitsandbytes config for `LLM_QUANTIZATION` (int8, nf4, none)."""
+        if self.quantization == "none":
+            return None
+        if self.quantization not in {"int8", "nf4"}:
+            raise ValueError(f"Unsupported LLM_QUANTIZATION '{self.quantization}' (expected int8, nf4 or none)")
+        if not torch.cuda.is_available():
+            logger.warning("LLM_QUANTIZATION=%s requires CUDA; loading unquantized weights", self.quantization)
+            return None
+
+        try:
+            from transformers import BitsAndBytesConfig
+        except ImportError as exc:  # pragma: no cover - runtime dependency
+            raise RuntimeError("Quantized loading requires `pip install bitsandbytes accelerate`.") from exc
+
+        if self.quantization == "int8":
+            return BitsAndBytesConfig(load_in_8bit=True)
+        return BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_compute_dtype=torch.bfloat16,
+        )
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        max_tokens: int | None = None,
+        json_schema: Dict[str, Any] | None = None,
+    ) -> str:
+        """Generate a completion for a chat-style prompt.
+
+        When ``json_schema`` is given the reply is constrained to a single JSON object:
+        Ollama enforces the schema grammar, Transformers prefills ``{`` and stops as soon
+        as the object is closed.
+        """
+        max_tokens = max_tokens or self.max_new_tokens
         if self.provider == "ollama":
-            return self._ollama_chat(messages, max_tokens=max_tokens)
+            return self._ollama_chat(messages, max_tokens=max_tokens, json_schema=json_schema)
 
         self._ensure_pipeline()
-        assert self._pipeline is not None  # for type checkers
-
-        result = self._pipeline(
-            prompt,
-            max_new_tokens=max_tokens,
-            do_sample=True,
-            temperature=self.temperature,
-            top_p=0.9,
-            repetition_penalty=1.05,
-            num_return_sequences=1,
-            pad_token_id=self._pipeline.tokenizer.eos_token_id,
-        )[0]["generated_text"]
-
-        return result[len(prompt) :].strip()
-
-    def _ollama_chat(self, messages: List[Dict[str, str]], *, max_tokens: int) -> str:
+        request = _PendingChat(
+            prompt=self._split_prompt(messages),
+            max_tokens=max_tokens,
+            json_mode=json_schema is not None,
+        )
+        if self.batch_window_s <= 0 or self.max_batch_size <= 1:
+            return self._generate_batch([request])[0]
+
+        self._ensure_batch_worker()
+        self._pending.put(request)
+        return request.future.result()
+
+    def _ensure_batch_worker(self) -> None:
+        with self._lock:
+            if self._batch_worker is None or not self._batch_worker.is_alive():
+                self._batch_worker = threading.Thread(target=self._batch_loop, name="llm-batcher", daemon=True)
+                self._batch_worker.start()
+
+    def _batch_loop(self) -> None:
+        """Coalesce chats arriving within the batch window into one generate call."""
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.batch_window_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                outputs = self._generate_batch(batch)
+            except Exception as exc:
+                for item in batch:
+                    item.future.set_exception(exc)
+            else:
+                for item, text in zip(batch, outputs):
+                    item.future.set_result(text)
+
+    def _encode_prefix(self, prefix: str) -> Tuple[Tuple[int, ...], str, int] | None:
+        """Tokenize a shared system prefix once, with a seam the suffix can be joined at.
+
+        SentencePiece tokenizers (Llama, Mistral) prepend ``▁`` to standalone text, so a
+        suffix tokenized on its own differs from the same text tokenized after the prefix.
+        The suffix is therefore tokenized behind an anchor (the prefix's trailing newlines)
+        whose ids are dropped again. Each candidate seam is checked once against the unsplit
+        tokenization of every role tag a suffix can start with; returns
+        ``(prefix_ids, anchor, anchor_len)``, or None when no seam round-trips.
+        """
+        prefix_ids = tuple(self._tokenizer(prefix).input_ids)
+        for anchor in ("", "\n\n"):
+            if not prefix.endswith(anchor):
+                continue
+            anchor_len = len(self._tokenizer(anchor, add_special_tokens=False).input_ids) if anchor else 0
+            if all(
+                [*prefix_ids, *self._tokenizer(anchor + probe, add_special_tokens=False).input_ids[anchor_len:]]
+                == self._tokenizer(prefix + probe).input_ids
+                for probe in _SEAM_PROBES
+            ):
+                return prefix_ids, anchor, anchor_len
+        logger.info("Tokenizer cannot split prompts after the system prefix; tokenizing full prompts")
+        return None
+
+    def _encode_prompt(self, request: _PendingChat) -> List[int]:
+        prefix, suffix = request.prompt
+        if request.json_mode:
+            suffix += "{"
+        seam = self._prefix_ids(prefix) if prefix else None
+        if seam is None:
+            return self._tokenizer(prefix + suffix).input_ids
+        prefix_ids, anchor, anchor_len = seam
+        return [*prefix_ids, *self._tokenizer(anchor + suffix, add_special_tokens=False).input_ids[anchor_len:]]
+
+    def _generate_batch(self, batch: List[_PendingChat]) -> List[str]:
+        assert self._model is not None and self._tokenizer is not None  # for type checkers
+
+        import torch
+        from transformers import StoppingCriteriaList
+
+        if len(batch) > 1:
+            logger.info("Generating %d batched prompts", len(batch))
+        encoded = [self._encode_prompt(request) for request in batch]
+        prompt_len = max(len(ids) for ids in encoded)
+        pad_id = self._tokenizer.pad_token_id
+        # Left padding keeps every prompt flush against its generated tokens.
+        input_ids = torch.tensor([[pad_id] * (prompt_len - len(ids)) + ids for ids in encoded])
+        attention_mask = torch.tensor([[0] * (prompt_len - len(ids)) + [1] * len(ids) for ids in encoded])
+        with torch.inference_mode():
+            output = self._model.generate(
+                input_ids=input_ids.to(self._model.device),
+                attention_mask=attention_mask.to(self._model.device),
+                max_new_tokens=max(request.max_tokens for request in batch),
+                do_sample=False,  # greedy: deterministic JSON, no sampling overhead
+                repetition_penalty=1.05,
+                use_cache=True,
+                pad_token_id=pad_id,
+                stopping_criteria=StoppingCriteriaList(
+                    [_JsonObjectStop(self._tokenizer, prompt_len, [request.json_mode for request in batch])]
+                ),
+            )
+
+        replies = []
+        for row, request in zip(output, batch):
+            new_tokens = row[prompt_len : prompt_len + request.max_tokens]
+            text = self._tokenizer.decode(new_tokens, skip_special_tokens=True).strip()
+            replies.append(self._trim_json("{" + text) if request.json_mode else text)
+        return replies
+
+    @staticmethod
+    def _trim_json(text: str) -> str:
+        """Drop anything generated after the JSON object (e.g. the rest of the stop token)."""
         try:
-            import ollama  # type: ignore
-        except ImportError as exc:  # pragma: no cover - optional dependency
-            raise RuntimeError("Install `ollama` Python package to use the Ollama provider.") from exc
+            _, end = _JSON_DECODER.raw_decode(text)
+        except ValueError:
+            return text
+        return text[:end]
 
-        client = ollama.Client()
+    def _ollama_chat(
+        self, messages: List[Dict[str, str]], *, max_tokens: int, json_schema: Dict[str, Any] | None = None
+    ) -> str:
+        session = self._ensure_ollama_session()
         logger.info("Sending chat to local Ollama model '%s'", self.model)
-        response = client.chat(
-            model=self.model,
-            messages=messages,
-            options={"temperature": self.temperature, "num_predict": max_tokens},
-        )
-        return response["message"]["content"].strip()
+        payload: Dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "stream": False,
+            "options": {"temperature": self.temperature, "num_predict": max_tokens},
+        }
+        if json_schema is not None:
+            payload["format"] = json_schema
+        response = session.post(f"{self.ollama_host}/api/chat", json=payload, timeout=self.ollama_timeout)
+        response.raise_for_status()
+        return response.json()["message"]["content"].strip()
+
+    def _ensure_ollama_session(self):
+        """Keep one pooled HTTP session so Ollama calls reuse keep-alive connections."""
+        if self._ollama_session is not None:
+            return self._ollama_session
+
+        try:
+            import requests
+            from requests.adapters import HTTPAdapter
+        except ImportError as exc:  # pragma: no cover - runtime dependency
+            raise RuntimeError("Install `requests` to use the Ollama provider.") from exc
+
+        with self._lock:
+            if self._ollama_session is None:
+                session = requests.Session()
+                session.mount("http://", HTTPAdapter(pool_maxsize=16))
+                session.mount("https://", HTTPAdapter(pool_maxsize=16))
+                self._ollama_session = session
+        return self._ollama_session
+
+    @classmethod
+    def _split_prompt(cls, messages: List[Dict[str, str]]) -> Tuple[str, str]:
+        """Render messages as (leading system prefix, per-request suffix).
+
+        Concatenating both halves yields exactly ``_format_messages(messages)``; whether
+        their token ids concatenate the same way is checked in ``_encode_prefix``.
+        """
+        split = 0
+        while split < len(messages) and messages[split].get("role") == "system":
+            split += 1
+        return cls._format_turns(messages[:split]), cls._format_messages(messages[split:])
 
     @staticmethod
-    def _format_messages(messages: List[Dict[str, str]]) -> str:
-        parts: List[str] = []
-        for message in messages:
-            role = message.get("role", "user")
-            parts.append(f"<|{role}|>\n{message.get('content','').strip()}\n")
-        parts.append("<|assistant|>\n")
-        return "\n".join(parts)
+    def _format_turns(messages: List[Dict[str, str]]) -> str:
+        return "".join(f"<|{m.get('role', 'user')}|>\n{m.get('content', '').strip()}\n\n" for m in messages)
+
+    @classmethod
+    def _format_messages(cls, messages: List[Dict[str, str]]) -> str:
+        return f"{cls._format_turns(messages)}<|assistant|>\n"
 
 
-open_source_llm = LocalLLMClient()
+@lru_cache(maxsize=1)
+def get_open_source_llm() -> LocalLLMClient:
+    """Return the process-wide local LLM client, created on first use."""
+    return LocalLLMClient()
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import logging
 
+import anyio
 from fastapi import FastAPI, HTTPException
 
 from app.schemas import GenerateWorldRequest, GenerateWorldResponse
@@ -15,14 +16,15 @@ app = FastAPI(title="Tsuana 3D World Generator", version="2.0.0")
 
 
 @app.get("/health")
-def health() -> dict:
+async def health() -> dict:
     return {"status": "ok", "message": "✅ API is running"}
 
 
 @app.post("/api/v1/world", response_model=GenerateWorldResponse)
-def create_world(request: GenerateWorldRequest) -> GenerateWorldResponse:
+async def create_world(request: GenerateWorldRequest) -> GenerateWorldResponse:
     try:
-        return world_generator.generate(request)
+        # Generation is blocking (LLM + mesh synthesis); keep it off the event loop.
+        return await anyio.to_thread.run_sync(world_generator.generate, request)
     except ValueError as exc:
         logger.warning("Bad request: %s", exc)
         raise HTTPException(status_code=400, detail=str(exc)) from exc
@@ -1,12 +1,13 @@
 """Stage 1: Convert raw user description into a structured world design spec."""
 from __future__ import annotations
 
-import json
 import logging
 import random
+import re
 from typing import Final
 
-from app.ai_client import open_source_llm
+from app.adapters import get_adapter, get_json_schema
+from app.ai_client import get_open_source_llm
 from app.schemas import WorldDesignSpec
 
 logger = logging.getLogger(__name__)
@@ -29,26 +30,51 @@ SCHEMA: Final[str] = """
 }
 """
 
+# A filled-in spec is ~150-250 tokens; more budget only buys trailing filler.
+MAX_RESPONSE_TOKENS: Final[int] = 256
+
+# Identical for every request, so the LLM client can reuse its prefix tokenization.
+PREFIX_MESSAGES: Final = (
+    {"role": "system", "content": SYSTEM_PROMPT},
+    {"role": "system", "content": f"Schema: {SCHEMA}"},
+)
+
+FALLBACK_TERRAINS: Final = ("mountainous", "archipelago", "rolling hills", "canyon", "mesa plateau", "coastal cliffs")
+FALLBACK_WEATHERS: Final = ("overcast with distant storms", "crisp blue sky", "misty horizon", "twilight haze", "aurora filled night")
+FALLBACK_MOODS: Final = ("mysterious", "epic", "serene", "hopeful", "ominous")
+FALLBACK_TIMES: Final = ("golden hour", "midnight", "dawn", "dusk")
+FALLBACK_SCALES_KM: Final = (12, 18, 25, 40, 60)
+
+# Keyword -> biome, in priority order (forest wins over desert when both appear).
+BIOME_KEYWORDS: Final[dict[str, str]] = {
+    "forest": "forest",
+    "forests": "forest",
+    "forested": "forest",
+    "rainforest": "forest",
+    "woods": "forest",
+    "woodland": "forest",
+    "desert": "desert",
+    "deserts": "desert",
+    "dunes": "desert",
+}
+_WORD_RE: Final = re.compile(r"[a-z]+")
+
 
 def _fallback_spec(description: str, seed: int | None) -> WorldDesignSpec:
-    random.seed(seed or 42)
-    terrains = ["mountainous", "archipelago", "rolling hills", "canyon", "mesa plateau", "coastal cliffs"]
-    weathers = ["overcast with distant storms", "crisp blue sky", "misty horizon", "twilight haze", "aurora filled night"]
-    moods = ["mysterious", "epic", "serene", "hopeful", "ominous"]
-    times = ["golden hour", "midnight", "dawn", "dusk"]
-    scale = random.choice([12, 18, 25, 40, 60])
+    rng = random.Random(seed or 42)
+    scale = rng.choice(FALLBACK_SCALES_KM)
 
-    description_lower = description.lower()
-    biome = "forest" if "forest" in description_lower else "desert" if "desert" in description_lower else "mixed biomes"
+    tokens = set(_WORD_RE.findall(description.lower()))
+    biome = next((biome for keyword, biome in BIOME_KEYWORDS.items() if keyword in tokens), "mixed biomes")
 
     return WorldDesignSpec(
         biome=biome,
-        terrain_type=random.choice(terrains),
+        terrain_type=rng.choice(FALLBACK_TERRAINS),
         scale_km=float(scale),
         structures=["floating platforms", "bridges", "modular towers"],
-        sky_weather=random.choice(weathers),
-        mood=random.choice(moods),
-        time_of_day=random.choice(times),
+        sky_weather=rng.choice(FALLBACK_WEATHERS),
+        mood=rng.choice(FALLBACK_MOODS),
+        time_of_day=rng.choice(FALLBACK_TIMES),
         landmarks=["central hub", "northern ridge", "eastern river delta"],
     )
 
@@ -58,15 +84,17 @@ def generate_design_spec(raw_description: str, *, seed: int | None = None) -> Wo
         raise ValueError("description must be non-empty")
 
     messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "system", "content": f"Schema: {SCHEMA}"},
+        *PREFIX_MESSAGES,
         {"role": "user", "content": raw_description.strip()},
     ]
 
     try:
-        content = open_source_llm.chat(messages, max_tokens=600)
-        data = json.loads(content)
-        spec = WorldDesignSpec.model_validate(data)
+        content = get_open_source_llm().chat(
+            messages,
+            max_tokens=MAX_RESPONSE_TOKENS,
+            json_schema=get_json_schema(WorldDesignSpec),
+        )
+        spec = get_adapter(WorldDesignSpec).validate_json(content)
         logger.info("World design spec generated via LLM")
         return spec
     except Exception as exc:
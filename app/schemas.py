@@ -1,9 +1,44 @@
 """Pydantic schemas describing the world-generation contract."""
 from __future__ import annotations
 
-from typing import List, Literal, Optional, Tuple
+from enum import Enum
+from typing import Annotated, List, Optional, Tuple
 
-from pydantic import BaseModel, Field, conlist, confloat, conint
+from pydantic import BaseModel, ConfigDict, Field, confloat, conint
+
+# One XYZ/RGB triple type shared by every 3-vector field, so pydantic reuses a single validator.
+Vec3 = Annotated[Tuple[float, float, float], Field()]
+
+
+class _StrEnum(str, Enum):
+    """String-valued enum that formats as its value (mesh names, f-strings, logs)."""
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class SplineKind(_StrEnum):
+    ROAD = "road"
+    RIVER = "river"
+
+
+class StructureKind(_StrEnum):
+    TOWER = "tower"
+    HUB = "hub"
+    FARM = "farm"
+    OUTPOST = "outpost"
+    BRIDGE = "bridge"
+    SPIRE = "spire"
+    HANGAR = "hangar"
+    DOME = "dome"
+
+
+class SkyType(_StrEnum):
+    CLEAR = "clear"
+    CLOUDY = "cloudy"
+    STORM = "storm"
+    AURORA = "aurora"
+    STARS = "stars"
 
 
 class WorldDesignSpec(BaseModel):
@@ -18,8 +53,7 @@ class WorldDesignSpec(BaseModel):
     time_of_day: str = Field(..., min_length=3, description="Time of day or lighting condition.")
     landmarks: List[str] = Field(default_factory=list, description="Named landmarks that should appear.")
 
-    class Config:
-        extra = "forbid"
+    model_config = ConfigDict(extra="forbid")
 
 
 class TerrainNoise(BaseModel):
@@ -32,34 +66,32 @@ class TerrainNoise(BaseModel):
     elevation_scale: confloat(gt=0.1, le=2000.0) = 480.0
     base_height: confloat(ge=-500.0, le=1500.0) = 35.0
 
-    class Config:
-        extra = "forbid"
+    # Frozen (and so hashable): the engine caches generated heightmaps per noise config.
+    model_config = ConfigDict(extra="forbid", frozen=True)
 
 
 class SplineRule(BaseModel):
     name: str = "arterial_road"
-    kind: Literal["road", "river"] = "road"
-    control_points: List[conlist(float, min_length=3, max_length=3)] = Field(
+    kind: SplineKind = SplineKind.ROAD
+    control_points: List[Vec3] = Field(
         ..., description="XYZ control points forming a Catmull-Rom spline."
     )
     width: confloat(gt=0.5, le=200.0) = 12.0
     depth: confloat(ge=0.0, le=80.0) = 2.0
     material: str = "asphalt"
 
-    class Config:
-        extra = "forbid"
+    model_config = ConfigDict(extra="forbid")
 
 
 class ObjectPlacementRule(BaseModel):
-    kind: Literal["tower", "hub", "farm", "outpost", "bridge", "spire", "hangar", "dome"] = "tower"
+    kind: StructureKind = StructureKind.TOWER
     count: conint(ge=1, le=200) = 12
     scale_range: Tuple[float, float] = (0.8, 1.8)
     height_range: Tuple[float, float] = (12.0, 90.0)
     scatter_radius: confloat(gt=10.0, le=2000.0) = 320.0
     cluster: bool = True
 
-    class Config:
-        extra = "forbid"
+    model_config = ConfigDict(extra="forbid")
 
 
 class VegetationRule(BaseModel):
@@ -67,30 +99,27 @@ class VegetationRule(BaseModel):
     species: List[str] = Field(default_factory=lambda: ["conifer", "broadleaf", "shrub"])
     max_height: confloat(gt=0.5, le=60.0) = 12.0
 
-    class Config:
-        extra = "forbid"
+    model_config = ConfigDict(extra="forbid")
 
 
 class LightingConfig(BaseModel):
     sun_azimuth: confloat(ge=0.0, le=360.0) = 135.0
     sun_elevation: confloat(ge=-5.0, le=90.0) = 38.0
     ambient_intensity: confloat(gt=0.0, le=3.0) = 0.45
-    sky_color: conlist(float, min_length=3, max_length=3) = [0.48, 0.68, 0.96]
+    sky_color: Vec3 = (0.48, 0.68, 0.96)
     fog_density: confloat(ge=0.0, le=0.2) = 0.02
     exposure: confloat(gt=0.01, le=5.0) = 1.0
     mood: str = "neutral"
 
-    class Config:
-        extra = "forbid"
+    model_config = ConfigDict(extra="forbid")
 
 
 class SkyConfig(BaseModel):
-    type: Literal["clear", "cloudy", "storm", "aurora", "stars"] = "clear"
+    type: SkyType = SkyType.CLEAR
     cloud_density: confloat(ge=0.0, le=1.0) = 0.25
     haze: confloat(ge=0.0, le=1.0) = 0.1
 
-    class Config:
-        extra = "forbid"
+    model_config = ConfigDict(extra="forbid")
 
 
 class WorldSchema(BaseModel):
@@ -107,19 +136,22 @@ class WorldSchema(BaseModel):
     lighting: LightingConfig
     sky: SkyConfig
 
-    class Config:
-        extra = "forbid"
+    model_config = ConfigDict(extra="forbid")
 
 
 class WorldLayoutObject(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str
-    position: Tuple[float, float, float]
-    scale: Tuple[float, float, float]
+    position: Vec3
+    scale: Vec3
     kind: str
     material: str
 
 
 class WorldLayout(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     terrain_bounds_m: Tuple[float, float]
     objects: List[WorldLayoutObject]
     splines: List[SplineRule]
@@ -127,6 +159,8 @@ class WorldLayout(BaseModel):
 
 
 class WorldMetadata(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     design: WorldDesignSpec
     schema: WorldSchema
     layout: WorldLayout
@@ -139,6 +173,8 @@ class GenerateWorldRequest(BaseModel):
 
 
 class GenerateWorldResponse(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     world_path: str
     preview_image: str
     unity_import: str
@@ -1,16 +1,21 @@
 """Stage 2: Generate strict procedural schema for the world."""
 from __future__ import annotations
 
-import json
 import logging
+import os
 import random
+from functools import lru_cache
 from typing import Final, List
 
-from app.ai_client import open_source_llm
+from app.adapters import get_adapter, get_json_schema
+from app.ai_client import get_open_source_llm
 from app.schemas import (
     LightingConfig,
     ObjectPlacementRule,
     SkyConfig,
+    SkyType,
+    SplineKind,
+    StructureKind,
     TerrainNoise,
     VegetationRule,
     WorldDesignSpec,
@@ -84,112 +89,141 @@ SCHEMA_PROMPT: Final[str] = """
 """
 
 MAX_SEED_SPACE: Final[int] = 2**20
+VALIDATE_FALLBACK: Final[bool] = os.getenv("VALIDATE_FALLBACK_SCHEMA", "0").lower() in {"1", "true", "yes"}
+
+# Identical for every request, so the LLM client can reuse its prefix tokenization.
+PREFIX_MESSAGES: Final = (
+    {"role": "system", "content": SYSTEM_PROMPT},
+    {"role": "system", "content": f"Schema: {SCHEMA_PROMPT}"},
+)
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return min(max(value, low), high)
 
 
 def _fallback_schema(design: WorldDesignSpec, seed: int | None) -> WorldSchema:
+    # Every value below is generated here and known-valid (values derived from scale_km are
+    # clamped to the schema bounds), so the models are built with model_construct;
+    # VALIDATE_FALLBACK_SCHEMA=1 re-validates the result for debugging.
     rng = random.Random(seed or 42)
+    randint, uniform = rng.randint, rng.uniform
+    sk = design.scale_km
+    is_night = "night" in design.time_of_day.lower()
+    is_forest = "forest" in design.biome.lower()
 
-    base_seed = rng.randint(0, MAX_SEED_SPACE)
-    octaves = rng.randint(4, 7)
-    frequency = rng.uniform(0.3, 0.8)
-    amplitude = rng.uniform(90, 210)
+    base_seed = randint(0, MAX_SEED_SPACE)
+    octaves = randint(4, 7)
+    frequency = uniform(0.3, 0.8)
+    amplitude = uniform(90, 210)
 
     object_rules: List[ObjectPlacementRule] = [
-        ObjectPlacementRule(
-            kind="tower",
-            count=rng.randint(8, 22),
+        ObjectPlacementRule.model_construct(
+            kind=StructureKind.TOWER,
+            count=randint(8, 22),
             scale_range=(0.9, 1.6),
             height_range=(24.0, 90.0),
-            scatter_radius=design.scale_km * 25,
+            scatter_radius=_clamp(sk * 25, 12.0, 2000.0),
             cluster=True,
         ),
-        ObjectPlacementRule(
-            kind="bridge",
-            count=max(2, int(design.scale_km // 5)),
+        ObjectPlacementRule.model_construct(
+            kind=StructureKind.BRIDGE,
+            count=max(2, int(sk // 5)),
             scale_range=(0.6, 1.3),
             height_range=(8.0, 22.0),
-            scatter_radius=design.scale_km * 30,
+            scatter_radius=_clamp(sk * 30, 12.0, 2000.0),
             cluster=False,
         ),
     ]
 
     base_spline = [
-        [0.0, 0.0, 0.0],
-        [design.scale_km * 180, 0.0, design.scale_km * 260],
-        [design.scale_km * 520, 0.0, design.scale_km * 720],
+        (0.0, 0.0, 0.0),
+        (sk * 180, 0.0, sk * 260),
+        (sk * 520, 0.0, sk * 720),
     ]
 
-    return WorldSchema(
+    schema = WorldSchema.model_construct(
         biome=design.biome,
         terrain_type=design.terrain_type,
-        scale_km=design.scale_km,
-        heightmap=TerrainNoise(
+        scale_km=sk,
+        heightmap=TerrainNoise.model_construct(
             seed=base_seed,
             octaves=octaves,
             frequency=frequency,
             amplitude=amplitude,
             lacunarity=2.0,
             persistence=0.5,
-            elevation_scale=design.scale_km * 20,
+            elevation_scale=min(sk * 20, 2000.0),
             base_height=12.0,
         ),
         terrain_features=["canyons", "plateaus", "river deltas"],
         object_rules=object_rules,
         splines=[
-            SplineRule(
+            SplineRule.model_construct(
                 name="arterial_route",
-                kind="road",
+                kind=SplineKind.ROAD,
                 control_points=base_spline,
-                width=max(12.0, design.scale_km * 0.4),
+                width=max(12.0, sk * 0.4),
                 depth=1.2,
                 material="stone",
             ),
-            SplineRule(
+            SplineRule.model_construct(
                 name="primary_river",
-                kind="river",
+                kind=SplineKind.RIVER,
                 control_points=[
-                    [design.scale_km * 0.5, 0.0, -design.scale_km * 120],
-                    [design.scale_km * 220, 0.0, design.scale_km * 110],
-                    [design.scale_km * 520, 0.0, design.scale_km * 420],
+                    (sk * 0.5, 0.0, -sk * 120),
+                    (sk * 220, 0.0, sk * 110),
+                    (sk * 520, 0.0, sk * 420),
                 ],
-                width=max(16.0, design.scale_km * 0.8),
+                width=max(16.0, sk * 0.8),
                 depth=5.0,
                 material="water",
             ),
         ],
-        vegetation=VegetationRule(
+        vegetation=VegetationRule.model_construct(
             density_per_km2=280.0,
-            species=["oak", "pine", "bamboo"] if "forest" in design.biome.lower() else ["shrub", "grass"],
+            species=["oak", "pine", "bamboo"] if is_forest else ["shrub", "grass"],
             max_height=18.0,
         ),
-        lighting=LightingConfig(
+        lighting=LightingConfig.model_construct(
             sun_azimuth=135.0,
-            sun_elevation=32.0 if "night" not in design.time_of_day.lower() else 6.0,
-            ambient_intensity=0.52 if "night" in design.time_of_day.lower() else 0.35,
-            sky_color=[0.42, 0.52, 0.72],
+            sun_elevation=6.0 if is_night else 32.0,
+            ambient_intensity=0.52 if is_night else 0.35,
+            sky_color=(0.42, 0.52, 0.72),
             fog_density=0.02,
             exposure=1.1,
             mood=design.mood,
         ),
-        sky=SkyConfig(
-            type="stars" if "night" in design.time_of_day.lower() else "cloudy",
+        sky=SkyConfig.model_construct(
+            type=SkyType.STARS if is_night else SkyType.CLOUDY,
             cloud_density=0.25,
             haze=0.08,
         ),
     )
+    if VALIDATE_FALLBACK:
+        return WorldSchema.model_validate(schema.model_dump())
+    return schema
 
 
-def generate_world_schema(design: WorldDesignSpec, *, seed: int | None = None) -> WorldSchema:
+@lru_cache(maxsize=256)
+def _llm_schema(design_json: str) -> WorldSchema:
+    """Validated LLM schema for a canonical design dump; repeated designs skip the model round-trip.
+
+    Validation runs inside the cached call, so a malformed or schema-invalid reply raises and
+    is never memoized: the next request for that design asks the model again.
+    """
     messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "system", "content": f"Schema: {SCHEMA_PROMPT}"},
-        {"role": "user", "content": design.model_dump_json()},
+        *PREFIX_MESSAGES,
+        {"role": "user", "content": design_json},
     ]
+    content = get_open_source_llm().chat(messages, max_tokens=900, json_schema=get_json_schema(WorldSchema))
+    return get_adapter(WorldSchema).validate_json(content)
 
+
+def generate_world_schema(design: WorldDesignSpec, *, seed: int | None = None) -> WorldSchema:
     try:
-        content = open_source_llm.chat(messages, max_tokens=900)
-        data = json.loads(content)
-        schema = WorldSchema.model_validate(data)
+        # Copied so callers never share (and mutate) the memoized instance.
+        schema = _llm_schema(design.model_dump_json()).model_copy(deep=True)
         logger.info("World schema generated via LLM")
         return schema
     except Exception as exc:
@@ -1,18 +1,54 @@
 """Export procedural world into OBJ/MTL plus metadata."""
 from __future__ import annotations
 
-import json
-import os
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Final, List, Tuple, Union
 
 import numpy as np
-import trimesh
 from PIL import Image
 
 from app.schemas import WorldMetadata
-from core.procedural_engine import MeshAsset, WorldBuildResult
+from core.procedural_engine import InstancedMeshAsset, MeshAsset, WorldBuildResult
+
+
+_UNITY_TEMPLATE: Final[str] = """using UnityEngine;
+using UnityEditor;
+public class TsuanaWorldImporter : MonoBehaviour
+{
+    [MenuItem("Tsuana/Import World")]
+    static void ImportWorld()
+    {
+        var path = "%s";
+        var obj = AssetDatabase.LoadAssetAtPath<GameObject>(path);
+        if (obj == null) {
+            Debug.LogError("World OBJ not found at " + path);
+            return;
+        }
+        var instance = Instantiate(obj);
+        instance.transform.position = Vector3.zero;
+        Selection.activeGameObject = instance;
+    }
+}
+"""
+
+
+MATERIAL_COLORS: Final[Dict[str, Tuple[int, int, int]]] = {
+    "terrain": (118, 102, 83),
+    "metal": (180, 185, 190),
+    "concrete": (160, 160, 160),
+    "asphalt": (38, 38, 38),
+    "water": (25, 95, 150),
+    "foliage": (34, 120, 72),
+}
+# Structure-of-arrays view of MATERIAL_COLORS: one (N, 3) colour block and its MTL Kd values.
+MATERIAL_NAMES: Final = tuple(MATERIAL_COLORS)
+MATERIAL_RGB: Final = np.array(list(MATERIAL_COLORS.values()), dtype=np.uint8)
+MATERIAL_KD: Final = MATERIAL_RGB / 255.0
 
 
 @dataclass
@@ -23,79 +59,86 @@ class WorldExport:
     metadata_path: Path
 
 
+@lru_cache(maxsize=64)
+def _encode_solid_png(color: tuple) -> bytes:
+    """PNG bytes for a 1x1 texel of ``color``; importers tile it across the mesh."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (1, 1), color).save(buffer, format="PNG", compress_level=1, optimize=False)
+    return buffer.getvalue()
+
+
+def _format_rows(row_format: str, rows: np.ndarray) -> str:
+    """Format every row of ``rows`` with one C-level ``%`` pass instead of a Python loop."""
+    return (row_format * len(rows)) % tuple(rows.ravel().tolist())
+
+
 class MeshExporter:
     def __init__(self, root: Path | str = "exports"):
         self.root = Path(root)
         self.root.mkdir(parents=True, exist_ok=True)
+        # Exports run on worker threads, so preview scratch buffers are kept per thread.
+        self._preview_buffers = threading.local()
 
-    def _write_materials(self, materials_dir: Path, materials: Dict[str, List[int]]) -> Dict[str, Path]:
-        texture_paths: Dict[str, Path] = {}
+    def _write_materials(self, materials_dir: Path) -> Dict[str, Path]:
         materials_dir.mkdir(parents=True, exist_ok=True)
-        for name, color in materials.items():
-            texture = Image.new("RGB", (256, 256), tuple(color))
+
+        def _write_one(name: str, rgb: np.ndarray) -> Tuple[str, Path]:
             texture_path = materials_dir / f"{name}.png"
-            texture.save(texture_path)
-            texture_paths[name] = texture_path
-        return texture_paths
+            texture_path.write_bytes(_encode_solid_png(tuple(rgb.tolist())))
+            return name, texture_path
+
+        # Each texture is an independent encode + write; overlap them rather than run serially.
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(MATERIAL_NAMES)))) as pool:
+            return dict(pool.map(_write_one, MATERIAL_NAMES, MATERIAL_RGB))
 
     def _write_mtl(self, mtl_path: Path, texture_paths: Dict[str, Path]) -> None:
-        lines = []
-        for name, tex_path in texture_paths.items():
-            r, g, b = Image.open(tex_path).convert("RGB").getpixel((0, 0))
-            lines.append(f"newmtl {name}")
-            lines.append(f"Kd {r/255:.4f} {g/255:.4f} {b/255:.4f}")
-            lines.append("Ka 0.2 0.2 0.2")
-            lines.append("Ks 0.0 0.0 0.0")
-            lines.append("d 1.0")
-            lines.append(f"map_Kd textures/{tex_path.name}")
-            lines.append("")
+        lines = [
+            f"newmtl {name}\n"
+            f"Kd {r:.4f} {g:.4f} {b:.4f}\n"
+            "Ka 0.2 0.2 0.2\n"
+            "Ks 0.0 0.0 0.0\n"
+            "d 1.0\n"
+            f"map_Kd textures/{texture_paths[name].name}\n"
+            for name, (r, g, b) in zip(MATERIAL_NAMES, MATERIAL_KD.tolist())
+        ]
         mtl_path.write_text("\n".join(lines))
 
     @staticmethod
-    def _export_meshes(geometry_dir: Path, meshes: List[MeshAsset], mtl_name: str) -> Path:
+    def _export_meshes(
+        geometry_dir: Path, meshes: List[Union[MeshAsset, InstancedMeshAsset]], mtl_name: str
+    ) -> Path:
         geometry_dir.mkdir(parents=True, exist_ok=True)
-        scene = trimesh.Scene()
-        for asset in meshes:
-            mesh = asset.mesh.copy()
-            material = getattr(mesh.visual, "material", None)
-            if material is None or not hasattr(material, "name"):
-                mesh.visual.material = trimesh.visual.material.SimpleMaterial(name=asset.material)
-            else:
-                mesh.visual.material.name = asset.material
-            scene.add_geometry(mesh, node_name=asset.name)
         world_obj = geometry_dir.parent / "world.obj"
-        scene.export(world_obj, file_type="obj", include_normals=True, include_color=True, mtl_name=mtl_name)
+        offset = 1  # OBJ indices are 1-based and global across objects
+        with world_obj.open("w", encoding="utf-8") as fh:
+            fh.write(f"mtllib {mtl_name}\n")
+            for asset in meshes:
+                mesh = asset.mesh  # instanced assets bake here; OBJ has no instancing
+                colors = np.asarray(mesh.visual.vertex_colors, dtype=np.float64)[:, :3] / 255.0
+                fh.write(f"o {asset.name}\nusemtl {asset.material}\n")
+                fh.write(_format_rows("v %.6f %.6f %.6f %.4f %.4f %.4f\n", np.hstack((mesh.vertices, colors))))
+                fh.write(_format_rows("vn %.6f %.6f %.6f\n", mesh.vertex_normals))
+                faces = np.repeat(np.asarray(mesh.faces, dtype=np.int64) + offset, 2, axis=1)
+                fh.write(_format_rows("f %d//%d %d//%d %d//%d\n", faces))
+                offset += len(mesh.vertices)
         return world_obj
 
-    @staticmethod
-    def _write_preview(preview_path: Path, heightmap: np.ndarray) -> None:
-        normalized = (heightmap - heightmap.min()) / (heightmap.max() - heightmap.min() + 1e-6)
-        img = (normalized * 255).astype(np.uint8)
-        image = Image.fromarray(img, mode="L").convert("RGB")
-        image.save(preview_path)
+    def _preview_scratch(self, shape: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
+        by_shape = self._preview_buffers.__dict__.setdefault("by_shape", {})
+        if shape not in by_shape:
+            by_shape[shape] = (np.empty(shape, dtype=np.float32), np.empty(shape, dtype=np.uint8))
+        return by_shape[shape]
+
+    def _write_preview(self, preview_path: Path, heightmap: np.ndarray) -> None:
+        scratch, img = self._preview_scratch(heightmap.shape)
+        np.subtract(heightmap, heightmap.min(), out=scratch)
+        np.multiply(scratch, 255.0 / (np.ptp(heightmap) + 1e-6), out=scratch)
+        np.copyto(img, scratch, casting="unsafe")
+        Image.fromarray(img, mode="L").save(preview_path, optimize=False, compress_level=1)
 
     @staticmethod
     def _write_unity_script(path: Path, world_obj_relative: str) -> None:
-        script = f"""using UnityEngine;
-using UnityEditor;
-public class TsuanaWorldImporter : MonoBehaviour
-{{
-    [MenuItem("Tsuana/Import World")]
-    static void ImportWorld()
-    {{
-        var path = "{world_obj_relative}";
-        var obj = AssetDatabase.LoadAssetAtPath<GameObject>(path);
-        if (obj == null) {{
-            Debug.LogError("World OBJ not found at " + path);
-            return;
-        }}
-        var instance = Instantiate(obj);
-        instance.transform.position = Vector3.zero;
-        Selection.activeGameObject = instance;
-    }}
-}}
-"""
-        path.write_text(script)
+        path.write_text(_UNITY_TEMPLATE % world_obj_relative)
 
     def export(self, build: WorldBuildResult, metadata: WorldMetadata, run_id: str) -> WorldExport:
         world_dir = self.root / run_id / "world"
@@ -104,15 +147,7 @@ public class TsuanaWorldImporter : MonoBehaviour
         materials_dir = world_dir / "materials"
         world_dir.mkdir(parents=True, exist_ok=True)
 
-        materials = {
-            "terrain": [118, 102, 83],
-            "metal": [180, 185, 190],
-            "concrete": [160, 160, 160],
-            "asphalt": [38, 38, 38],
-            "water": [25, 95, 150],
-            "foliage": [34, 120, 72],
-        }
-        texture_paths = self._write_materials(textures_dir, materials)
+        texture_paths = self._write_materials(textures_dir)
         mtl_path = world_dir / "world.mtl"
         self._write_mtl(mtl_path, texture_paths)
 
@@ -121,13 +156,10 @@ public class TsuanaWorldImporter : MonoBehaviour
         self._write_preview(preview_path, build.heightmap)
 
         metadata_path = world_dir / "world.json"
-        metadata.layout = build.layout  # ensure updated layout is persisted
-        metadata_dict = metadata.model_dump()
-        metadata_path.write_text(json.dumps(metadata_dict, indent=2))
+        metadata_path.write_text(metadata.model_dump_json(indent=2), encoding="utf-8")
 
         unity_script = world_dir / "unity_import.cs"
-        rel_obj = os.path.relpath(world_obj_path, world_dir)
-        self._write_unity_script(unity_script, rel_obj.replace("\\", "/"))
+        self._write_unity_script(unity_script, world_obj_path.relative_to(world_dir).as_posix())
 
         return WorldExport(
             world_path=world_dir,
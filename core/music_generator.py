@@ -3,8 +3,9 @@ from __future__ import annotations
 
 import math
 import wave
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 import numpy as np
 
@@ -14,31 +15,51 @@ def _brownian_noise(length: int, rng: np.random.Generator) -> np.ndarray:
     return np.cumsum(steps)
 
 
+@lru_cache(maxsize=16)
+def _render_ambient(harmonics: Tuple[float, ...], carrier_freq: int, length: int, sample_rate: int) -> np.ndarray:
+    """Synthesise the int16 samples; deterministic, so identical settings are rendered once."""
+    rng = np.random.default_rng(42)
+    base = _brownian_noise(length, rng).astype(np.float32)
+
+    time = np.arange(length, dtype=np.float32) / np.float32(sample_rate)
+    # Accumulate harmonics through one reusable scratch buffer instead of a temporary per term.
+    signal = np.zeros_like(base)
+    scratch = np.empty_like(base)
+    for h in harmonics:
+        np.multiply(np.float32(2 * math.pi * (carrier_freq * h)), time, out=scratch)
+        np.sin(scratch, out=scratch)
+        signal += scratch
+    signal *= 0.2
+    np.multiply(base, np.float32(0.05), out=scratch)
+    signal += scratch
+    np.clip(signal, -1.0, 1.0, out=signal)
+
+    signal *= np.float32(32767)
+    audio = signal.astype(np.int16)
+    audio.flags.writeable = False
+    return audio
+
+
 def generate_ambient_music(mood: str, output_dir: str | Path, duration_seconds: int = 45) -> Optional[str]:
     sample_rate = 22050
     length = duration_seconds * sample_rate
-    rng = np.random.default_rng(42)
-    base = _brownian_noise(length, rng)
 
     mood = mood.lower()
-    harmonics = [0.25, 0.5, 0.75] if "calm" in mood or "serene" in mood else [0.3, 0.6, 0.9]
+    harmonics = (0.25, 0.5, 0.75) if "calm" in mood or "serene" in mood else (0.3, 0.6, 0.9)
     carrier_freq = 110 if "dark" in mood else 220
-    time = np.arange(length) / sample_rate
-    signal = np.zeros_like(base)
-    for h in harmonics:
-        signal += np.sin(2 * math.pi * (carrier_freq * h) * time)
-    signal = signal * 0.2 + base * 0.05
-    signal = np.clip(signal, -1.0, 1.0)
+    audio = _render_ambient(harmonics, carrier_freq, length, sample_rate)
 
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     output_path = output_dir / "ambient_music.wav"
 
-    audio = (signal * 32767).astype(np.int16)
-    with wave.open(str(output_path), "w") as wf:
+    # Known frame count up front: the header is written once and the samples go out
+    # straight from the array's buffer, with no intermediate bytes copy.
+    with open(output_path, "wb", buffering=1 << 20) as fh, wave.open(fh, "wb") as wf:
         wf.setnchannels(1)
         wf.setsampwidth(2)
         wf.setframerate(sample_rate)
-        wf.writeframes(audio.tobytes())
+        wf.setnframes(len(audio))
+        wf.writeframesraw(memoryview(audio))
 
     return str(output_path)
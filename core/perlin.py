@@ -0,0 +1,85 @@
+"""Vectorised Perlin "improved" noise matching ``noise.pnoise2``."""
+from __future__ import annotations
+
+import numpy as np
+
+# Ken Perlin's reference permutation (the table ``noise.pnoise2`` indexes).
+_PERM = np.array(
+    [
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225,
+    140, 36, 103, 30, 69, 142, 8, 99, 37, 240, 21, 10, 23, 190, 6, 148,
+    247, 120, 234, 75, 0, 26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32,
+    57, 177, 33, 88, 237, 149, 56, 87, 174, 20, 125, 136, 171, 168, 68, 175,
+    74, 165, 71, 134, 139, 48, 27, 166, 77, 146, 158, 231, 83, 111, 229, 122,
+    60, 211, 133, 230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54,
+    65, 25, 63, 161, 1, 216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169,
+    200, 196, 135, 130, 116, 188, 159, 86, 164, 100, 109, 198, 173, 186, 3, 64,
+    52, 217, 226, 250, 124, 123, 5, 202, 38, 147, 118, 126, 255, 82, 85, 212,
+    207, 206, 59, 227, 47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170, 213,
+    119, 248, 152, 2, 44, 154, 163, 70, 221, 153, 101, 155, 167, 43, 172, 9,
+    129, 22, 39, 253, 19, 98, 108, 110, 79, 113, 224, 232, 178, 185, 112, 104,
+    218, 246, 97, 228, 251, 34, 242, 193, 238, 210, 144, 12, 191, 179, 162, 241,
+    81, 51, 145, 235, 249, 14, 239, 107, 49, 192, 214, 31, 181, 199, 106, 157,
+    184, 84, 204, 176, 115, 121, 50, 45, 127, 4, 150, 254, 138, 236, 205, 93,
+    222, 114, 67, 29, 24, 72, 243, 141, 128, 195, 78, 66, 215, 61, 156, 180,
+    ],
+    dtype=np.intp,
+)
+
+# First two columns of the reference 3D gradient set; grad2 uses ``hash & 15``.
+_GRAD2 = np.array(
+    [
+        [1, 1], [-1, 1], [1, -1], [-1, -1],
+        [1, 0], [-1, 0], [1, 0], [-1, 0],
+        [0, 1], [0, -1], [0, 1], [0, -1],
+        [1, 0], [-1, 0], [0, -1], [0, 1],
+    ],
+    dtype=np.float32,
+)
+
+
+def _grad2(hash_: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    g = _GRAD2[hash_ & 15]
+    return x * g[..., 0] + y * g[..., 1]
+
+
+def perlin2(x: np.ndarray, y: np.ndarray, *, repeat: float = 1024.0, base: int = 0) -> np.ndarray:
+    """Single-octave 2D Perlin noise over coordinate arrays, in float32.
+
+    Matches ``noise.pnoise2(x, y, repeatx=repeat, repeaty=repeat, base=base)`` element-wise.
+    The permutation lookups wrap modulo 256, so any ``base`` is well defined (the C
+    extension reads past its 512-entry table once ``base`` pushes an index that far).
+    """
+    x = np.asarray(x, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32)
+    repeat = np.float32(repeat)
+
+    i = np.floor(np.fmod(x, repeat)).astype(np.intp)
+    j = np.floor(np.fmod(y, repeat)).astype(np.intp)
+    ii = np.fmod((i + 1).astype(np.float32), repeat).astype(np.intp)
+    jj = np.fmod((j + 1).astype(np.float32), repeat).astype(np.intp)
+    i, j, ii, jj = ((v & 255) + base for v in (i, j, ii, jj))
+
+    x = x - np.floor(x)
+    y = y - np.floor(y)
+    fx = x * x * x * (x * (x * np.float32(6) - np.float32(15)) + np.float32(10))
+    fy = y * y * y * (y * (y * np.float32(6) - np.float32(15)) + np.float32(10))
+
+    perm = _PERM
+    a = perm[i & 255]
+    b = perm[ii & 255]
+    aa = perm[(a + j) & 255]
+    ab = perm[(a + jj) & 255]
+    ba = perm[(b + j) & 255]
+    bb = perm[(b + jj) & 255]
+
+    one = np.float32(1)
+    x1 = x - one
+    y1 = y - one
+    n00 = _grad2(perm[aa], x, y)
+    n10 = _grad2(perm[ba], x1, y)
+    n01 = _grad2(perm[ab], x, y1)
+    n11 = _grad2(perm[bb], x1, y1)
+    lo = n00 + fx * (n10 - n00)
+    hi = n01 + fx * (n11 - n01)
+    return lo + fy * (hi - lo)
@@ -2,26 +2,62 @@
 from __future__ import annotations
 
 import math
-import random
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from functools import cached_property, lru_cache
+from typing import Dict, List, Tuple, Union
 
 import numpy as np
+import shapely
 import trimesh
-from noise import pnoise2
-from shapely.geometry import LineString, Point
+from scipy import ndimage
+from shapely.geometry import LineString
 
 from app.schemas import (
     ObjectPlacementRule,
     SplineRule,
+    TerrainNoise,
     WorldLayout,
     WorldLayoutObject,
     WorldSchema,
 )
+from core.perlin import perlin2
 
 MAX_VEGETATION_INSTANCES = 4000
 
 
+@lru_cache(maxsize=32)
+def _noise_heightmap(noise_cfg: TerrainNoise, scale_km: float, res: int) -> np.ndarray:
+    """fBm heightmap for a noise config; cached because identical configs recur across requests."""
+    size = scale_km * 1000
+    step = size / (res - 1)
+    coords = (np.arange(res) * step) / size
+    xs, ys = np.meshgrid(coords, coords, indexing="ij")
+    elevation = np.zeros((res, res), dtype=np.float64)
+    freq = noise_cfg.frequency
+    amp = noise_cfg.amplitude
+    for _ in range(noise_cfg.octaves):
+        octave = perlin2(xs * freq, ys * freq, repeat=1024, base=noise_cfg.seed)
+        elevation += octave.astype(np.float64) * amp
+        freq *= noise_cfg.lacunarity
+        amp *= noise_cfg.persistence
+    hm = elevation.astype(np.float32)
+    hm = (hm - hm.min()) / (hm.max() - hm.min() + 1e-6)
+    hm = hm * noise_cfg.elevation_scale + noise_cfg.base_height
+    hm.flags.writeable = False
+    return hm
+
+
+@lru_cache(maxsize=None)
+def _structure_prototype(kind: str) -> trimesh.Trimesh:
+    """Unit-sized primitive for a structure kind; each instance is a scaled copy of its vertices."""
+    if kind in {"tower", "spire"}:
+        return trimesh.creation.cylinder(radius=1.0, height=1.0)
+    if kind == "dome":
+        return trimesh.creation.icosphere(subdivisions=3, radius=1.0)
+    return trimesh.creation.box(extents=(1.0, 1.0, 1.0))
+
+
 @dataclass
 class MeshAsset:
     name: str
@@ -30,9 +66,37 @@ class MeshAsset:
     kind: str
 
 
+@dataclass
+class InstancedMeshAsset:
+    """One prototype mesh placed many times, stored as per-instance arrays rather than meshes."""
+
+    name: str
+    prototype: trimesh.Trimesh
+    transforms: np.ndarray  # (N, 4, 4) float64 affine transforms
+    colors: np.ndarray  # (N, 4) uint8 RGBA
+    material: str
+    kind: str
+
+    @property
+    def count(self) -> int:
+        return len(self.transforms)
+
+    @cached_property
+    def mesh(self) -> trimesh.Trimesh:
+        """All instances baked into one mesh, for consumers without instancing support."""
+        base_vertices = self.prototype.vertices
+        base_faces = self.prototype.faces
+        vertices = np.matmul(base_vertices, self.transforms[:, :3, :3].transpose(0, 2, 1))
+        vertices += self.transforms[:, None, :3, 3]
+        faces = base_faces[None, :, :] + (np.arange(self.count) * len(base_vertices))[:, None, None]
+        baked = trimesh.Trimesh(vertices=vertices.reshape(-1, 3), faces=faces.reshape(-1, 3), process=False)
+        baked.visual.vertex_colors = np.repeat(self.colors, len(base_vertices), axis=0)
+        return baked
+
+
 @dataclass
 class WorldBuildResult:
-    meshes: List[MeshAsset]
+    meshes: List[Union[MeshAsset, InstancedMeshAsset]]
     heightmap: np.ndarray
     layout: WorldLayout
 
@@ -40,35 +104,20 @@ class WorldBuildResult:
 class ProceduralEngine:
     """Build a VR-ready world using procedural techniques only."""
 
-    def __init__(self, grid_resolution: int = 180):
+    def __init__(self, grid_resolution: int = 180, fast: bool = False):
         self.grid_resolution = grid_resolution
+        # Sample the noise at half resolution and upsample bilinearly. Off by default: the
+        # finest octaves alias at half resolution, so the terrain loses its high-frequency detail.
+        self.fast = fast
 
     def _generate_heightmap(self, schema: WorldSchema) -> np.ndarray:
-        noise_cfg = schema.heightmap
-        size = schema.scale_km * 1000
-        step = size / (self.grid_resolution - 1)
-        hm = np.zeros((self.grid_resolution, self.grid_resolution), dtype=np.float32)
-        for i in range(self.grid_resolution):
-            for j in range(self.grid_resolution):
-                x = (i * step) / size
-                y = (j * step) / size
-                elevation = 0.0
-                freq = noise_cfg.frequency
-                amp = noise_cfg.amplitude
-                for _ in range(noise_cfg.octaves):
-                    elevation += pnoise2(
-                        x * freq,
-                        y * freq,
-                        repeatx=1024,
-                        repeaty=1024,
-                        base=noise_cfg.seed,
-                    ) * amp
-                    freq *= noise_cfg.lacunarity
-                    amp *= noise_cfg.persistence
-                hm[i, j] = elevation
-        hm = (hm - hm.min()) / (hm.max() - hm.min() + 1e-6)
-        hm = hm * noise_cfg.elevation_scale + noise_cfg.base_height
-        return hm
+        res = self.grid_resolution
+        if self.fast:
+            small = _noise_heightmap(schema.heightmap, schema.scale_km, max(2, res // 2))
+            # zoom() returns a fresh array, so it is safe to carve into.
+            return ndimage.zoom(small, res / small.shape[0], order=1).astype(np.float32, copy=False)
+        # The cached array is shared; splines are carved into it in place, so hand out a copy.
+        return _noise_heightmap(schema.heightmap, schema.scale_km, res).copy()
 
     @staticmethod
     def _carve_spline(heightmap: np.ndarray, schema: WorldSchema, spline: SplineRule) -> None:
@@ -76,157 +125,185 @@ class ProceduralEngine:
         step = size / (heightmap.shape[0] - 1)
         line = LineString([(p[0], p[2]) for p in spline.control_points])
         buffer = line.buffer(spline.width, cap_style=2, join_style=2)
-        depth = spline.depth
-        for i in range(heightmap.shape[0]):
-            for j in range(heightmap.shape[1]):
-                x = i * step
-                y = j * step
-                if buffer.contains(Point(x, y)):
-                    if spline.kind == "river":
-                        heightmap[i, j] -= depth
-                    else:
-                        heightmap[i, j] -= depth * 0.3
+        shapely.prepare(buffer)
+        # Only cells inside the buffer's bounding box can be carved; test just that window.
+        min_x, min_y, max_x, max_y = buffer.bounds
+        i0, i1 = max(0, math.ceil(min_x / step)), min(heightmap.shape[0], math.floor(max_x / step) + 1)
+        j0, j1 = max(0, math.ceil(min_y / step)), min(heightmap.shape[1], math.floor(max_y / step) + 1)
+        if i0 >= i1 or j0 >= j1:
+            return
+        xs = np.arange(i0, i1) * step
+        ys = np.arange(j0, j1) * step
+        mask = shapely.contains_xy(buffer, xs[:, None], ys[None, :])
+        depth = spline.depth if spline.kind == "river" else spline.depth * 0.3
+        heightmap[i0:i1, j0:j1][mask] -= depth
 
     def _build_terrain_mesh(self, heightmap: np.ndarray, schema: WorldSchema) -> trimesh.Trimesh:
         resolution = heightmap.shape[0]
         size = schema.scale_km * 1000
         step = size / (resolution - 1)
-        vertices: List[Tuple[float, float, float]] = []
-        for i in range(resolution):
-            for j in range(resolution):
-                vertices.append((i * step, heightmap[i, j], j * step))
-
-        faces: List[Tuple[int, int, int]] = []
-        for i in range(resolution - 1):
-            for j in range(resolution - 1):
-                a = i * resolution + j
-                b = a + 1
-                c = a + resolution
-                d = c + 1
-                faces.append((a, c, b))
-                faces.append((b, c, d))
-
-        terrain = trimesh.Trimesh(vertices=np.array(vertices), faces=np.array(faces), process=False)
+        ii, jj = np.meshgrid(np.arange(resolution), np.arange(resolution), indexing="ij")
+        vertices = np.stack([ii * step, heightmap.astype(np.float64), jj * step], axis=-1).reshape(-1, 3)
+
+        a = (np.arange(resolution - 1)[:, None] * resolution + np.arange(resolution - 1)[None, :]).ravel()
+        b = a + 1
+        c = a + resolution
+        d = c + 1
+        # Interleave the two triangles of each quad to keep the original face order.
+        faces = np.stack([np.stack([a, c, b], axis=1), np.stack([b, c, d], axis=1)], axis=1).reshape(-1, 3)
+
+        terrain = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
         terrain.visual.vertex_colors = [122, 104, 80, 255]
         return terrain
 
     @staticmethod
-    def _place_object(rule: ObjectPlacementRule, size_m: float, rng: random.Random) -> Tuple[np.ndarray, np.ndarray]:
-        theta = rng.uniform(0, 2 * math.pi)
-        radius = rng.uniform(rule.scatter_radius * 0.4, rule.scatter_radius)
-        x = size_m / 2 + math.cos(theta) * radius
-        z = size_m / 2 + math.sin(theta) * radius
-        scale = rng.uniform(*rule.scale_range)
-        height = rng.uniform(*rule.height_range)
-        return np.array([x, 0.0, z], dtype=np.float32), np.array([scale, height / 10.0, scale], dtype=np.float32)
+    def _place_objects(rule: ObjectPlacementRule, size_m: float, gen: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions and scales, shape ``(rule.count, 3)`` each, for every instance of ``rule``."""
+        count = rule.count
+        theta = gen.uniform(0, 2 * math.pi, count)
+        radius = gen.uniform(rule.scatter_radius * 0.4, rule.scatter_radius, count)
+        scale = gen.uniform(*rule.scale_range, count)
+        height = gen.uniform(*rule.height_range, count)
+        positions = np.stack(
+            [size_m / 2 + np.cos(theta) * radius, np.zeros(count), size_m / 2 + np.sin(theta) * radius],
+            axis=1,
+        )
+        scales = np.stack([scale, height / 10.0, scale], axis=1)
+        return positions.astype(np.float32), scales.astype(np.float32)
 
     def _make_structure(self, rule: ObjectPlacementRule, position: np.ndarray, scale: np.ndarray, idx: int) -> MeshAsset:
         kind = rule.kind
         if kind in {"tower", "spire"}:
-            mesh = trimesh.creation.cylinder(radius=6 * scale[0], height=scale[1] * 10)
+            factors = (6 * scale[0], 6 * scale[0], scale[1] * 10)
         elif kind == "bridge":
-            mesh = trimesh.creation.box(extents=(scale[0] * 40, scale[1] * 2.5, scale[0] * 12))
+            factors = (scale[0] * 40, scale[1] * 2.5, scale[0] * 12)
         elif kind == "dome":
-            mesh = trimesh.creation.icosphere(subdivisions=3, radius=scale[0] * 12)
+            factors = (scale[0] * 12,) * 3
         else:
-            mesh = trimesh.creation.box(extents=(scale[0] * 12, scale[1] * 4, scale[0] * 12))
+            factors = (scale[0] * 12, scale[1] * 4, scale[0] * 12)
 
-        mesh.apply_translation(position + np.array([0.0, mesh.extents[1] * 0.5, 0.0]))
+        prototype = _structure_prototype(kind)
+        vertices = prototype.vertices * np.asarray(factors, dtype=np.float64)
+        vertices += position + np.array([0.0, np.ptp(vertices[:, 1]) * 0.5, 0.0])
+        mesh = trimesh.Trimesh(vertices=vertices, faces=prototype.faces.copy(), process=False)
         material = "metal" if kind in {"tower", "spire"} else "concrete"
         mesh.visual.vertex_colors = [180, 185, 190, 255]
         return MeshAsset(name=f"{kind}_{idx}", mesh=mesh, material=material, kind=kind)
 
-    def _scatter_vegetation(self, schema: WorldSchema, heightmap: np.ndarray, rng: random.Random) -> List[MeshAsset]:
+    @staticmethod
+    def _vegetation_count(schema: WorldSchema) -> int:
         count = int(schema.vegetation.density_per_km2 * max(schema.scale_km, 1))
-        count = min(count, MAX_VEGETATION_INSTANCES)
+        return min(count, MAX_VEGETATION_INSTANCES)
+
+    def _scatter_vegetation(
+        self, schema: WorldSchema, heightmap: np.ndarray, gen: np.random.Generator
+    ) -> List[InstancedMeshAsset]:
+        """Scatter vegetation as one instanced cone rather than one mesh per plant."""
+        count = self._vegetation_count(schema)
+        if count == 0:
+            return []
         size_m = schema.scale_km * 1000
-        assets: List[MeshAsset] = []
         base_mesh = trimesh.creation.cone(radius=1.1, height=4.5, sections=12)
 
         hm_res = heightmap.shape[0]
         step = size_m / (hm_res - 1)
-        for i in range(count):
-            x = rng.uniform(0, size_m)
-            z = rng.uniform(0, size_m)
-            xi = min(int(x / step), hm_res - 2)
-            zi = min(int(z / step), hm_res - 2)
-            h = float(heightmap[xi, zi])
-            instance = base_mesh.copy()
-            scale = rng.uniform(0.4, min(schema.vegetation.max_height / 4.5, 2.5))
-            instance.apply_scale([scale, scale, scale])
-            instance.apply_translation([x, h, z])
-            instance.visual.vertex_colors = [34, 120, 72, 255]
-            assets.append(MeshAsset(name=f"veg_{i}", mesh=instance, material="foliage", kind="vegetation"))
-        return assets
+        max_scale = min(schema.vegetation.max_height / 4.5, 2.5)
+        # One seeded numpy draw per attribute instead of three rng calls per plant.
+        xs = gen.uniform(0, size_m, count)
+        zs = gen.uniform(0, size_m, count)
+        scales = gen.uniform(0.4, max_scale, count)
+        xi = np.minimum((xs / step).astype(np.intp), hm_res - 2)
+        zi = np.minimum((zs / step).astype(np.intp), hm_res - 2)
+        offsets = np.stack([xs, heightmap[xi, zi].astype(np.float64), zs], axis=1)
+
+        transforms = np.zeros((count, 4, 4), dtype=np.float64)
+        transforms[:, [0, 1, 2], [0, 1, 2]] = scales[:, None]
+        transforms[:, :3, 3] = offsets
+        transforms[:, 3, 3] = 1.0
+        colors = np.tile(np.array([34, 120, 72, 255], dtype=np.uint8), (count, 1))
+        return [
+            InstancedMeshAsset(
+                name="vegetation_batch",
+                prototype=base_mesh,
+                transforms=transforms,
+                colors=colors,
+                material="foliage",
+                kind="vegetation",
+            )
+        ]
 
     def _build_spline_mesh(self, spline: SplineRule, schema: WorldSchema) -> MeshAsset:
         line = LineString([(p[0], p[2]) for p in spline.control_points])
-        length = line.length
-        samples = max(12, int(length / 6))
-        vertices: List[Tuple[float, float, float]] = []
+        samples = max(12, int(line.length / 6))
         width = spline.width * 0.5
 
-        coords = [line.interpolate(float(i) / samples, normalized=True).coords[0] for i in range(samples + 1)]
-        for idx, (x, z) in enumerate(coords):
-            if idx == 0:
-                nx, nz = coords[idx + 1][0] - x, coords[idx + 1][1] - z
-            else:
-                nx, nz = x - coords[idx - 1][0], z - coords[idx - 1][1]
-            length_vec = math.sqrt(nx * nx + nz * nz) + 1e-6
-            nx, nz = -nz / length_vec, nx / length_vec  # perpendicular
-            left = (x + nx * width, 0.0, z + nz * width)
-            right = (x - nx * width, 0.0, z - nz * width)
-            vertices.append(left)
-            vertices.append(right)
-
-        faces: List[Tuple[int, int, int]] = []
-        for i in range(0, len(vertices) - 2, 2):
-            faces.append((i, i + 1, i + 2))
-            faces.append((i + 1, i + 3, i + 2))
-
-        mesh = trimesh.Trimesh(vertices=np.array(vertices), faces=np.array(faces), process=False)
+        ts = np.arange(samples + 1) / samples
+        coords = shapely.get_coordinates(shapely.line_interpolate_point(line, ts, normalized=True))
+        # Backward differences along the curve (forward at the first sample), as the segment direction.
+        deltas = np.diff(coords, axis=0)
+        tangents = np.vstack([deltas[:1], deltas])
+        lengths = np.sqrt(tangents[:, 0] * tangents[:, 0] + tangents[:, 1] * tangents[:, 1]) + 1e-6
+        normals = np.stack([-tangents[:, 1] / lengths, tangents[:, 0] / lengths], axis=1)  # perpendicular
+
+        offsets = normals * width
+        vertices = np.zeros((2 * len(coords), 3), dtype=np.float64)
+        vertices[0::2, 0::2] = coords + offsets  # left
+        vertices[1::2, 0::2] = coords - offsets  # right
+
+        i = np.arange(0, len(vertices) - 2, 2)
+        faces = np.stack([np.stack([i, i + 1, i + 2], axis=1), np.stack([i + 1, i + 3, i + 2], axis=1)], axis=1)
+
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces.reshape(-1, 3), process=False)
         mesh.visual.vertex_colors = [50, 50, 50, 255] if spline.kind == "road" else [32, 80, 160, 220]
         return MeshAsset(name=spline.name, mesh=mesh, material=spline.material, kind=spline.kind)
 
     def build(self, schema: WorldSchema, *, seed: int | None = None) -> WorldBuildResult:
-        rng = random.Random(seed or schema.heightmap.seed)
         heightmap = self._generate_heightmap(schema)
         for spline in schema.splines:
             self._carve_spline(heightmap, schema, spline)
 
         terrain_mesh = self._build_terrain_mesh(heightmap, schema)
-        meshes: List[MeshAsset] = [MeshAsset(name="terrain", mesh=terrain_mesh, material="terrain", kind="terrain")]
+        meshes: List[Union[MeshAsset, InstancedMeshAsset]] = [
+            MeshAsset(name="terrain", mesh=terrain_mesh, material="terrain", kind="terrain")
+        ]
+
+        # Independent child streams per stage, so the stages below can run concurrently and stay deterministic.
+        placement_seq, vegetation_seq = np.random.SeedSequence(seed or schema.heightmap.seed).spawn(2)
+        placement_gen = np.random.default_rng(placement_seq)
+        vegetation_gen = np.random.default_rng(vegetation_seq)
 
         size_m = schema.scale_km * 1000
         layout_objects: List[WorldLayoutObject] = []
-        object_idx = 0
-        for rule in schema.object_rules:
-            for _ in range(rule.count):
-                pos, scale = self._place_object(rule, size_m, rng)
-                asset = self._make_structure(rule, pos, scale, object_idx)
-                meshes.append(asset)
-                layout_objects.append(
-                    WorldLayoutObject(
-                        name=asset.name,
-                        position=(float(pos[0]), float(pos[1]), float(pos[2])),
-                        scale=(float(scale[0]), float(scale[1]), float(scale[2])),
-                        kind=asset.kind,
-                        material=asset.material,
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            # Splines and vegetation only read the finished heightmap; structures build meanwhile.
+            spline_futures = [pool.submit(self._build_spline_mesh, spline, schema) for spline in schema.splines]
+            vegetation_future = pool.submit(self._scatter_vegetation, schema, heightmap, vegetation_gen)
+
+            object_idx = 0
+            for rule in schema.object_rules:
+                positions, scales = self._place_objects(rule, size_m, placement_gen)
+                for pos, scale in zip(positions, scales):
+                    asset = self._make_structure(rule, pos, scale, object_idx)
+                    meshes.append(asset)
+                    layout_objects.append(
+                        WorldLayoutObject(
+                            name=asset.name,
+                            position=(float(pos[0]), float(pos[1]), float(pos[2])),
+                            scale=(float(scale[0]), float(scale[1]), float(scale[2])),
+                            kind=asset.kind,
+                            material=asset.material,
+                        )
                     )
-                )
-                object_idx += 1
-
-        spline_meshes = [self._build_spline_mesh(spline, schema) for spline in schema.splines]
-        meshes.extend(spline_meshes)
+                    object_idx += 1
 
-        vegetation_assets = self._scatter_vegetation(schema, heightmap, rng)
-        meshes.extend(vegetation_assets)
+            meshes.extend(future.result() for future in spline_futures)
+            meshes.extend(vegetation_future.result())
 
         layout = WorldLayout(
             terrain_bounds_m=(size_m, size_m),
             objects=layout_objects,
             splines=schema.splines,
-            vegetation_count=len(vegetation_assets),
+            vegetation_count=self._vegetation_count(schema),
         )
 
         return WorldBuildResult(meshes=meshes, heightmap=heightmap, layout=layout)
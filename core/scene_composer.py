@@ -4,16 +4,71 @@ Combines multiple 3D objects into a complete VR-ready scene with proper position
 lighting, and materials. Exports to GLTF/GLB format.
 """
 
-import json
 import logging
+import math
+import sys
 import numpy as np
+import orjson
+from pathlib import Path
 from typing import List, Dict, Any, Tuple, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Slotted instances drop the per-object __dict__; dataclass(slots=True) needs Python 3.10+.
+_DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+# Static parts of the generated Unity script and A-Frame page; only the per-object and
+# per-light fragments are formatted at export time.
+_UNITY_SCRIPT_HEADER = """using UnityEngine;
+using System.Collections.Generic;
+
+public class ImportScene : MonoBehaviour
+{
+    void Start()
+    {
+"""
+
+_UNITY_SCRIPT_FOOTER = """
+    }
+}
+"""
+
+_AFRAME_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>VR World - Tsuana Generated</title>
+    <meta name="description" content="VR World">
+    <script src="https://aframe.io/releases/1.4.0/aframe.min.js"></script>
+</head>
+<body>
+    <a-scene>
+"""
+
+_AFRAME_FOOTER = """
+    </a-scene>
+</body>
+</html>
+"""
+
+
+def _rgb_hex(color: Tuple[float, float, float]) -> str:
+    """Convert an RGB triple in [0, 1] to a #rrggbb string."""
+    r, g, b = color
+    return f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
+
+
+def _pack_ndarray(obj: Any) -> Any:
+    """msgpack hook: numpy columns go out as raw buffers tagged with dtype and shape."""
+    if isinstance(obj, np.ndarray):
+        return {"dtype": obj.dtype.str, "shape": list(obj.shape), "data": obj.tobytes()}
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class SceneObject:
     """Represents a 3D object in the scene."""
     name: str
@@ -23,8 +78,18 @@ class SceneObject:
     scale: Tuple[float, float, float] = (1.0, 1.0, 1.0)
     material: Optional[Dict[str, Any]] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "model_path": self.model_path,
+            "position": self.position,
+            "rotation": self.rotation,
+            "scale": self.scale,
+            "material": self.material,
+        }
+
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class SceneLight:
     """Represents a light source in the scene."""
     light_type: str  # "directional", "point", "ambient"
@@ -32,23 +97,35 @@ class SceneLight:
     color: Tuple[float, float, float] = (1.0, 1.0, 1.0)
     intensity: float = 1.0
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "light_type": self.light_type,
+            "position": self.position,
+            "color": self.color,
+            "intensity": self.intensity,
+        }
+
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class SceneCamera:
     """Represents a camera viewpoint."""
     position: Tuple[float, float, float] = (0.0, 1.6, 5.0)
     target: Tuple[float, float, float] = (0.0, 0.0, 0.0)
     fov: float = 60.0
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {"position": self.position, "target": self.target, "fov": self.fov}
+
 
 class SceneComposer:
     """Composes multiple 3D objects into a complete VR-ready scene."""
     
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
         self.objects: List[SceneObject] = []
         self.lights: List[SceneLight] = []
         self.camera: Optional[SceneCamera] = None
         self.environment_settings: Dict[str, Any] = {}
+        self._rng = np.random.default_rng(seed)
     
     def add_object(
         self,
@@ -69,7 +146,7 @@ class SceneComposer:
             material=material
         )
         self.objects.append(obj)
-        logger.info(f"Added object '{name}' at position {position}")
+        logger.info("Added object '%s' at position %s", name, position)
     
     def add_light(
         self,
@@ -86,7 +163,7 @@ class SceneComposer:
             intensity=intensity
         )
         self.lights.append(light)
-        logger.info(f"Added {light_type} light at {position}")
+        logger.info("Added %s light at %s", light_type, position)
     
     def set_camera(
         self,
@@ -96,7 +173,7 @@ class SceneComposer:
     ) -> None:
         """Set the camera position and orientation."""
         self.camera = SceneCamera(position=position, target=target, fov=fov)
-        logger.info(f"Set camera at {position} looking at {target}")
+        logger.info("Set camera at %s looking at %s", position, target)
     
     def set_environment(
         self,
@@ -111,6 +188,19 @@ class SceneComposer:
             "ambient_light": ambient_light
         }
     
+    def set_positions(self, positions: np.ndarray) -> None:
+        """
+        Position every object at once.
+        
+        Args:
+            positions: (N, 3) array of x, y, z, one row per object in insertion order
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        if positions.shape != (len(self.objects), 3):
+            raise ValueError(f"Expected positions of shape ({len(self.objects)}, 3), got {positions.shape}")
+        for obj, position in zip(self.objects, positions.tolist()):
+            obj.position = tuple(position)
+    
     def auto_arrange_objects(self, layout: str = "grid") -> None:
         """
         Automatically arrange objects in the scene.
@@ -122,37 +212,36 @@ class SceneComposer:
             return
         
         num_objects = len(self.objects)
+        xz = None
         
         if layout == "grid":
-            grid_size = int(np.ceil(np.sqrt(num_objects)))
+            grid_size = math.isqrt(num_objects - 1) + 1
             spacing = 3.0
             
-            for i, obj in enumerate(self.objects):
-                row = i // grid_size
-                col = i % grid_size
-                x = (col - grid_size / 2) * spacing
-                z = (row - grid_size / 2) * spacing
-                obj.position = (x, 0.0, z)
+            i = np.arange(num_objects)
+            xz = np.column_stack((i % grid_size, i // grid_size))
+            xz = (xz - grid_size / 2) * spacing
                 
         elif layout == "circle":
             radius = max(5.0, num_objects * 0.8)
             
-            for i, obj in enumerate(self.objects):
-                angle = (2 * np.pi * i) / num_objects
-                x = radius * np.cos(angle)
-                z = radius * np.sin(angle)
-                obj.position = (float(x), 0.0, float(z))
-                # Rotate to face center
-                obj.rotation = (0.0, float(np.degrees(angle + np.pi)), 0.0)
+            # All angles in one pass rather than one trig call per object.
+            angles = (2 * np.pi * np.arange(num_objects)) / num_objects
+            xz = radius * np.column_stack((np.cos(angles), np.sin(angles)))
+            # Rotate to face center
+            for obj, ry in zip(self.objects, np.degrees(angles + np.pi).tolist()):
+                obj.rotation = (0.0, ry, 0.0)
                 
         elif layout == "random":
             area_size = num_objects * 2
-            for obj in self.objects:
-                x = np.random.uniform(-area_size, area_size)
-                z = np.random.uniform(-area_size, area_size)
-                obj.position = (float(x), 0.0, float(z))
+            xz = self._rng.uniform(-area_size, area_size, size=(num_objects, 2))
+        
+        if xz is not None:
+            positions = np.zeros((num_objects, 3))
+            positions[:, [0, 2]] = xz
+            self.set_positions(positions)
         
-        logger.info(f"Arranged {num_objects} objects in {layout} layout")
+        logger.info("Arranged %d objects in %s layout", num_objects, layout)
     
     def setup_default_lighting(self, mood: str = "neutral") -> None:
         """
@@ -185,127 +274,140 @@ class SceneComposer:
             self.add_light("ambient", intensity=0.4)
             self.add_light("directional", position=(10, 10, 10), intensity=1.0)
     
-    def export_scene_data(self, output_path: str = "scene_data.json") -> str:
+    def export_scene_data(
+        self,
+        output_path: str = "scene_data.json",
+        fmt: str = "json",
+        columnar: bool = False,
+        half_precision: bool = False,
+    ) -> str:
         """
-        Export scene configuration to JSON.
+        Export scene configuration to JSON or MessagePack.
         
         Args:
             output_path: Path to save the scene data
+            fmt: "json" for indented JSON, or "msgpack" for a compact binary
+                 encoding (floats stored as 32-bit) for programmatic consumers
+            columnar: Store objects as parallel per-field arrays instead of one
+                      dict per object
+            half_precision: Quantize the columnar float arrays to float16
+                            (msgpack only; JSON text would not shrink)
             
         Returns:
             Path to the exported file
         """
+        if fmt not in {"json", "msgpack"}:
+            raise ValueError(f"Unsupported scene data format: {fmt!r}")
+        if half_precision and not (columnar and fmt == "msgpack"):
+            raise ValueError("half_precision applies to columnar msgpack exports only")
+        
+        # Fields are plain values, so the hand-written to_dict skips asdict's recursive deepcopy.
         scene_data = {
-            "objects": [asdict(obj) for obj in self.objects],
-            "lights": [asdict(light) for light in self.lights],
-            "camera": asdict(self.camera) if self.camera else None,
+            "objects": (
+                self._object_columns(np.float16 if half_precision else np.float32)
+                if columnar
+                else [obj.to_dict() for obj in self.objects]
+            ),
+            "lights": [light.to_dict() for light in self.lights],
+            "camera": self.camera.to_dict() if self.camera else None,
             "environment": self.environment_settings
         }
         
-        with open(output_path, "w") as f:
-            json.dump(scene_data, f, indent=2)
+        if fmt == "msgpack":
+            try:
+                import msgpack
+            except ImportError as exc:  # pragma: no cover - optional dependency
+                raise RuntimeError("MessagePack export requires `pip install msgpack`.") from exc
+            payload = msgpack.packb(scene_data, use_single_float=True, default=_pack_ndarray)
+        else:
+            payload = orjson.dumps(scene_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        Path(output_path).write_bytes(payload)
         
-        logger.info(f"Exported scene data to {output_path}")
+        logger.info("Exported scene data to %s", output_path)
         return output_path
     
+    def _object_columns(self, dtype: Any = np.float32) -> Dict[str, Any]:
+        """Objects as one array per field: each key is written once rather than once per object."""
+        objects = self.objects
+        return {
+            "names": [obj.name for obj in objects],
+            "model_paths": [obj.model_path for obj in objects],
+            "positions": np.array([obj.position for obj in objects], dtype=dtype).reshape(-1, 3),
+            "rotations": np.array([obj.rotation for obj in objects], dtype=dtype).reshape(-1, 3),
+            "scales": np.array([obj.scale for obj in objects], dtype=dtype).reshape(-1, 3),
+            "materials": [obj.material for obj in objects],
+        }
+    
     def generate_unity_import_script(self, output_path: str = "ImportScene.cs") -> str:
         """Generate a Unity C# script to import the scene."""
-        script = '''using UnityEngine;
-using System.Collections.Generic;
-
-public class ImportScene : MonoBehaviour
-{
-    void Start()
-    {
-'''
+        # Fragments are collected and joined once; repeated str += recopies the whole script.
+        parts = [_UNITY_SCRIPT_HEADER]
         for i, obj in enumerate(self.objects):
             x, y, z = obj.position
             rx, ry, rz = obj.rotation
             sx, sy, sz = obj.scale
             
-            script += f'''
+            parts.append(f'''
         // {obj.name}
         GameObject obj{i} = new GameObject("{obj.name}");
         obj{i}.transform.position = new Vector3({x}f, {y}f, {z}f);
         obj{i}.transform.rotation = Quaternion.Euler({rx}f, {ry}f, {rz}f);
         obj{i}.transform.localScale = new Vector3({sx}f, {sy}f, {sz}f);
         // Load model from: {obj.model_path}
-'''
+''')
         
-        script += '''
-    }
-}
-'''
-        with open(output_path, "w") as f:
-            f.write(script)
+        parts.append(_UNITY_SCRIPT_FOOTER)
+        Path(output_path).write_text("".join(parts))
         
-        logger.info(f"Generated Unity import script: {output_path}")
+        logger.info("Generated Unity import script: %s", output_path)
         return output_path
     
     def generate_aframe_html(self, output_path: str = "scene.html") -> str:
         """Generate an A-Frame HTML file for web VR viewing."""
-        html = '''<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <title>VR World - Tsuana Generated</title>
-    <meta name="description" content="VR World">
-    <script src="https://aframe.io/releases/1.4.0/aframe.min.js"></script>
-</head>
-<body>
-    <a-scene>
-'''
+        parts = [_AFRAME_HEADER]
         
         # Add objects
         for obj in self.objects:
             x, y, z = obj.position
             rx, ry, rz = obj.rotation
-            html += f'''
+            parts.append(f'''
         <!-- {obj.name} -->
         <a-entity 
             gltf-model="url({obj.model_path})"
             position="{x} {y} {z}"
             rotation="{rx} {ry} {rz}">
         </a-entity>
-'''
+''')
         
         # Add lights
         for light in self.lights:
             if light.light_type == "ambient":
-                r, g, b = light.color
-                color = f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
-                html += f'        <a-light type="ambient" color="{color}" intensity="{light.intensity}"></a-light>\n'
+                color = _rgb_hex(light.color)
+                parts.append(f'        <a-light type="ambient" color="{color}" intensity="{light.intensity}"></a-light>\n')
             elif light.light_type == "directional":
                 x, y, z = light.position
-                r, g, b = light.color
-                color = f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
-                html += f'        <a-light type="directional" position="{x} {y} {z}" color="{color}" intensity="{light.intensity}"></a-light>\n'
+                color = _rgb_hex(light.color)
+                parts.append(f'        <a-light type="directional" position="{x} {y} {z}" color="{color}" intensity="{light.intensity}"></a-light>\n')
         
         # Add camera
         if self.camera:
             x, y, z = self.camera.position
-            html += f'        <a-entity camera look-controls wasd-controls position="{x} {y} {z}"></a-entity>\n'
+            parts.append(f'        <a-entity camera look-controls wasd-controls position="{x} {y} {z}"></a-entity>\n')
         else:
-            html += '        <a-entity camera look-controls wasd-controls position="0 1.6 5"></a-entity>\n'
+            parts.append('        <a-entity camera look-controls wasd-controls position="0 1.6 5"></a-entity>\n')
         
         # Add sky
         if self.environment_settings:
-            r, g, b = self.environment_settings.get("sky_color", (0.5, 0.7, 1.0))
-            color = f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
-            html += f'        <a-sky color="{color}"></a-sky>\n'
+            color = _rgb_hex(self.environment_settings.get("sky_color", (0.5, 0.7, 1.0)))
+            parts.append(f'        <a-sky color="{color}"></a-sky>\n')
         else:
-            html += '        <a-sky color="#87CEEB"></a-sky>\n'
+            parts.append('        <a-sky color="#87CEEB"></a-sky>\n')
         
-        html += '''
-    </a-scene>
-</body>
-</html>
-'''
+        parts.append(_AFRAME_FOOTER)
         
-        with open(output_path, "w") as f:
-            f.write(html)
+        Path(output_path).write_text("".join(parts))
         
-        logger.info(f"Generated A-Frame VR scene: {output_path}")
+        logger.info("Generated A-Frame VR scene: %s", output_path)
         return output_path
     
     def get_summary(self) -> str:
@@ -1,10 +1,14 @@
 """End-to-end world generation orchestrator."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Sequence
+
+import anyio
 
 from app.prompt_service import generate_design_spec
 from app.schemas import (
@@ -25,14 +29,16 @@ class WorldGenerator:
         self.exporter = MeshExporter(export_root)
 
     def generate(self, request: GenerateWorldRequest) -> GenerateWorldResponse:
-        seed = request.seed or int(datetime.utcnow().timestamp())
+        now = datetime.utcnow()
+        seed = request.seed or int(now.timestamp())
         design = generate_design_spec(request.description, seed=seed)
         schema = generate_world_schema(design, seed=seed)
 
         build = self.engine.build(schema, seed=seed)
         metadata = WorldMetadata(design=design, schema=schema, layout=build.layout)
 
-        run_id = f"world_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+        # Suffixed so worlds generated concurrently within the same second get separate folders.
+        run_id = f"world_{now:%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}"
         export = self.exporter.export(build, metadata, run_id)
 
         return GenerateWorldResponse(
@@ -42,5 +48,13 @@ class WorldGenerator:
             metadata=metadata,
         )
 
+    async def agenerate(self, requests: Sequence[GenerateWorldRequest]) -> List[GenerateWorldResponse]:
+        """Generate several worlds concurrently.
+
+        Each request runs in a worker thread, so their LLM calls overlap and coalesce in
+        the client's batcher instead of queueing one prompt after another.
+        """
+        return list(await asyncio.gather(*(anyio.to_thread.run_sync(self.generate, r) for r in requests)))
+
 
 world_generator = WorldGenerator()
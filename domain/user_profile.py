@@ -1,4 +1,27 @@
+import re
+from functools import lru_cache
+
+# Phrases that mark a reply as a question back rather than an answer; one alternation
+# scans the value once instead of once per marker.
+_INVALID_MARKERS = re.compile("|".join(map(re.escape, [
+    "?",
+    "what do",
+    "wdym",
+    "like",
+    "mean",
+    "explain"
+])))
+
+
+@lru_cache(maxsize=256)
+def _is_valid_value(value: str) -> bool:
+    # Surrounding whitespace cannot change whether a marker occurs, so no strip() is needed.
+    return _INVALID_MARKERS.search(value.lower()) is None
+
+
 class UserProfile:
+    __slots__ = ("mood", "environment", "style", "scale")
+
     def __init__(self):
         self.mood = None
         self.environment = None
@@ -6,7 +29,7 @@ class UserProfile:
         self.scale = None
 
     def is_complete(self):
-        return all([self.mood, self.environment, self.style, self.scale])
+        return bool(self.mood and self.environment and self.style and self.scale)
 
     def to_dict(self):
         return {
@@ -20,15 +43,5 @@ class UserProfile:
         if not value:
             return False
 
-        value = value.lower().strip()
-
-        invalid_markers = [
-            "?",
-            "what do",
-            "wdym",
-            "like",
-            "mean",
-            "explain"
-        ]
-
-        return not any(marker in value for marker in invalid_markers)
+        # The check needs no profile state; the cached module function memoizes repeated answers.
+        return _is_valid_value(value)
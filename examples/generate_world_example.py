@@ -3,8 +3,11 @@ Complete example: Generate a 3D world with .obj files
 
 This demonstrates the full pipeline from text description to 3D model files.
 """
-import requests
+import argparse
+import asyncio
+import httpx
 import json
+import os
 import time
 from pathlib import Path
 
@@ -12,11 +15,23 @@ from pathlib import Path
 API_BASE = "http://127.0.0.1:8000"
 
 
-def generate_world_with_models(description: str):
+def _make_client() -> httpx.AsyncClient:
+    """Pooled client; connection failures are retried before a request gives up."""
+    return httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(retries=2),
+        limits=httpx.Limits(max_connections=16, max_keepalive_connections=4),
+    )
+
+
+async def generate_world_with_models_async(client: httpx.AsyncClient, description: str):
     """
     Generate a complete 3D world with .obj model files.
     
+    Several calls can share one client and run together with asyncio.gather, so their
+    API round-trips overlap instead of running back to back.
+    
     Args:
+        client: Shared async HTTP client
         description: Text description of the world you want to create
         
     Returns:
@@ -30,62 +45,29 @@ def generate_world_with_models(description: str):
     payload = {"description": description}
     
     print("\n📤 Sending request to API...")
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     
     try:
-        response = requests.post(
+        response = await client.post(
             f"{API_BASE}/api/v1/world",
             json=payload,
-            timeout=300  # 5 minutes for 3D generation
+            timeout=300.0  # 5 minutes for 3D generation
         )
         
-        elapsed = time.time() - start_time
+        elapsed = (time.perf_counter_ns() - start_ns) / 1e9
         
         if response.status_code == 200:
             result = response.json()
-            
-            # Print progress messages
-            print("\n📋 Progress Messages:")
-            print("-" * 70)
-            for msg in result.get("messages", []):
-                print(msg)
-            
-            # Print summary
-            print("\n" + "=" * 70)
-            print("✅ GENERATION COMPLETE!")
-            print("=" * 70)
-            
-            world = result.get("world", {})
-            world_plan = world.get("world_plan", {})
-            
-            print(f"\n📊 World Summary:")
-            print(f"  Environment: {world_plan.get('environment')}")
-            print(f"  Mood: {world_plan.get('mood')}")
-            print(f"  Style: {world_plan.get('style')}")
-            print(f"  Objects: {len(world.get('objects', []))}")
-            
-            print(f"\n💾 Files Saved:")
-            print(f"  JSON: {result.get('saved_to')}")
-            
-            models = result.get("models", [])
-            if models:
-                print(f"  3D Models: {len(models)} .obj files")
-                for model in models:
-                    print(f"    ✓ {model['name']}: {model['path']}")
-            else:
-                print(f"  3D Models: None (Tripo3D not configured)")
-            
-            print(f"\n⏱️  Total Time: {elapsed:.2f} seconds")
-            
+            _print_result(result, elapsed)
             return result
         else:
             print(f"\n❌ Error {response.status_code}: {response.text}")
             return None
             
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print("\n⏱️  Request timed out. Try a simpler description.")
         return None
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("\n❌ Could not connect to API. Make sure the server is running:")
         print("   uvicorn app.api:app --host 127.0.0.1 --port 8000")
         return None
@@ -94,11 +76,69 @@ def generate_world_with_models(description: str):
         return None
 
 
+def generate_world_with_models(description: str):
+    """Synchronous wrapper around generate_world_with_models_async for a single world."""
+    async def _run():
+        async with _make_client() as client:
+            return await generate_world_with_models_async(client, description)
+    
+    return asyncio.run(_run())
+
+
+def _print_result(result: dict, elapsed: float) -> None:
+    """Print progress messages and a summary for one generated world."""
+    # Print progress messages
+    print("\n📋 Progress Messages:")
+    print("-" * 70)
+    for msg in result.get("messages", []):
+        print(msg)
+    
+    # Print summary
+    print("\n" + "=" * 70)
+    print("✅ GENERATION COMPLETE!")
+    print("=" * 70)
+    
+    world = result.get("world", {})
+    world_plan = world.get("world_plan", {})
+    
+    print(f"\n📊 World Summary:")
+    print(f"  Environment: {world_plan.get('environment')}")
+    print(f"  Mood: {world_plan.get('mood')}")
+    print(f"  Style: {world_plan.get('style')}")
+    print(f"  Objects: {len(world.get('objects', []))}")
+    
+    print(f"\n💾 Files Saved:")
+    print(f"  JSON: {result.get('saved_to')}")
+    
+    models = result.get("models", [])
+    if models:
+        print(f"  3D Models: {len(models)} .obj files")
+        for model in models:
+            print(f"    ✓ {model['name']}: {model['path']}")
+    else:
+        print(f"  3D Models: None (Tripo3D not configured)")
+    
+    print(f"\n⏱️  Total Time: {elapsed:.2f} seconds")
+
+
+async def generate_worlds(descriptions):
+    """Generate several worlds concurrently over one shared client."""
+    async with _make_client() as client:
+        return await asyncio.gather(
+            *(generate_world_with_models_async(client, d) for d in descriptions)
+        )
+
+
 def list_generated_worlds():
     """List all generated worlds and their models."""
     output_dir = Path("output/generated_worlds")
     
-    if not output_dir.exists():
+    # One directory read, which doubles as the existence check; the model-folder checks
+    # below are dict lookups, not stat() calls.
+    try:
+        with os.scandir(output_dir) as it:
+            entries = {entry.name: entry for entry in it}
+    except FileNotFoundError:
         print("No generated worlds found.")
         return
     
@@ -106,17 +146,17 @@ def list_generated_worlds():
     print("📁 Generated Worlds")
     print("=" * 70)
     
-    json_files = sorted(output_dir.glob("world_*.json"))
+    json_names = sorted(name for name in entries if name.startswith("world_") and name.endswith(".json"))
     
-    for json_file in json_files:
-        print(f"\n📄 {json_file.name}")
+    for json_name in json_names:
+        print(f"\n📄 {json_name}")
         
         # Check for corresponding models directory
-        model_dir_name = json_file.stem + "_models"
-        model_dir = output_dir / model_dir_name
+        model_dir = entries.get(json_name[:-len(".json")] + "_models")
         
-        if model_dir.exists():
-            obj_files = list(model_dir.glob("*.obj"))
+        if model_dir is not None and model_dir.is_dir():
+            with os.scandir(model_dir.path) as it:
+                obj_files = [entry for entry in it if entry.name.endswith(".obj")]
             print(f"   🎨 3D Models: {len(obj_files)} .obj files")
             for obj_file in obj_files:
                 size_kb = obj_file.stat().st_size / 1024
@@ -125,14 +165,35 @@ def list_generated_worlds():
             print(f"   🎨 3D Models: None")
 
 
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate worlds through the Tsuana API.")
+    parser.add_argument(
+        "--description", action="append", default=[],
+        help="World description to generate (repeatable)",
+    )
+    parser.add_argument(
+        "--batch", type=Path,
+        help="Text file with one world description per line",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    # Example 1: Simple object
-    print("\n🧪 Test 1: Simple Scene")
-    generate_world_with_models("A cozy bedroom with a bed and nightstand")
+    args = _parse_args()
     
-    # Example 2: More complex scene
-    # print("\n🧪 Test 2: Complex Scene")
-    # generate_world_with_models("A magical forest with glowing mushrooms and a small cottage")
+    # Scenes are requested concurrently; add more descriptions to run them side by side.
+    descriptions = list(args.description)
+    if args.batch:
+        descriptions += [line.strip() for line in args.batch.read_text(encoding="utf-8").splitlines() if line.strip()]
+    if not descriptions:
+        descriptions = [
+            # Example 1: Simple object
+            "A cozy bedroom with a bed and nightstand",
+            # Example 2: More complex scene
+            # "A magical forest with glowing mushrooms and a small cottage",
+        ]
+    print(f"\n🧪 Generating {len(descriptions)} scene(s)")
+    asyncio.run(generate_worlds(descriptions))
     
     # List all generated worlds
     print("\n")
@@ -0,0 +1,27 @@
+"""Settings for the legacy Tsuana CLI, read from the environment (and .env) once at import."""
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class Settings:
+    openai_api_key: Optional[str]
+    stability_api_key: Optional[str]
+    tsuana_concurrency: int
+    tsuana_profile: Optional[str]
+
+
+def load_settings() -> Settings:
+    load_dotenv()
+    return Settings(
+        openai_api_key=os.environ.get("OPENAI_API_KEY"),
+        stability_api_key=os.environ.get("STABILITY_API_KEY"),
+        tsuana_concurrency=int(os.environ.get("TSUANA_CONCURRENCY", "10")),
+        tsuana_profile=os.environ.get("TSUANA_PROFILE"),
+    )
+
+
+SETTINGS = load_settings()
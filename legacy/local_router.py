@@ -0,0 +1,26 @@
+"""Answer clarification turns locally.
+
+A clarification reply is one question about the first unset attribute from a fixed set of
+four, so it can be produced from the profile alone without a model round-trip.
+"""
+import orjson
+
+# Asked in this order: the environment frames the other three answers.
+QUESTIONS = {
+    "environment": "What kind of place should this world be (e.g. forest, city, desert, underwater)?",
+    "mood": "What mood should the world have (e.g. calm, eerie, joyful, tense)?",
+    "style": "What visual style do you want (e.g. realistic, low-poly, cartoon, cyberpunk)?",
+    "scale": "How large should the world feel (e.g. a small room, a village, a vast landscape)?",
+}
+
+
+def local_clarify(profile_dict):
+    """Question JSON for the first missing attribute, or None when every attribute is set."""
+    for attribute, question in QUESTIONS.items():
+        if not profile_dict.get(attribute):
+            return orjson.dumps({
+                "type": "question",
+                "question": question,
+                "target_attribute": attribute
+            }).decode()
+    return None
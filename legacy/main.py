@@ -5,10 +5,12 @@ Use the FastAPI service at /api/v1/world for the supported pipeline.
 
 raise SystemExit("Legacy CLI is deprecated. Run `uvicorn app.api:app --reload` instead.")
 
-import json
-import os
 import logging
+from pathlib import Path
+
+import orjson
 from typing import Dict, Any, List
+from config import SETTINGS
 from user_profile import UserProfile
 from tsuana import call_tsuana
 from scene_composer import SceneComposer
@@ -23,34 +25,44 @@ logger = logging.getLogger(__name__)
 ALLOWED_FIELDS = {"mood", "environment", "style", "scale"}
 
 
+# Hint lookups are module constants so each call is a single dict lookup.
+_POSITIONS: Dict[str, tuple] = {
+    "center": (0, 0, 0),
+    "front": (0, 0, -5),
+    "back": (0, 0, 5),
+    "left": (-5, 0, 0),
+    "right": (5, 0, 0),
+    "far_left": (-10, 0, 0),
+    "far_right": (10, 0, 0),
+    "front_left": (-3, 0, -3),
+    "front_right": (3, 0, -3),
+    "back_left": (-3, 0, 3),
+    "back_right": (3, 0, 3),
+}
+
+_SCALES: Dict[str, tuple] = {
+    "small": (0.5, 0.5, 0.5),
+    "medium": (1.0, 1.0, 1.0),
+    "large": (2.0, 2.0, 2.0),
+    "huge": (3.0, 3.0, 3.0)
+}
+
+# Checked in order; the first keyword found in the camera description wins.
+_CAMERA_PRESETS = (
+    ("front", (0, 1.6, 10)),
+    ("top", (0, 15, 0)),
+    ("side", (10, 1.6, 0)),
+)
+
+
 def position_hint_to_coordinates(hint: str, index: int, total: int) -> tuple:
     """Convert position hint to actual 3D coordinates."""
-    positions = {
-        "center": (0, 0, 0),
-        "front": (0, 0, -5),
-        "back": (0, 0, 5),
-        "left": (-5, 0, 0),
-        "right": (5, 0, 0),
-        "far_left": (-10, 0, 0),
-        "far_right": (10, 0, 0),
-        "front_left": (-3, 0, -3),
-        "front_right": (3, 0, -3),
-        "back_left": (-3, 0, 3),
-        "back_right": (3, 0, 3),
-    }
-    
-    return positions.get(hint, (index * 3 - total * 1.5, 0, 0))
+    return _POSITIONS.get(hint, (index * 3 - total * 1.5, 0, 0))
 
 
 def scale_hint_to_value(hint: str) -> tuple:
     """Convert scale hint to scale multiplier."""
-    scales = {
-        "small": (0.5, 0.5, 0.5),
-        "medium": (1.0, 1.0, 1.0),
-        "large": (2.0, 2.0, 2.0),
-        "huge": (3.0, 3.0, 3.0)
-    }
-    return scales.get(hint, (1.0, 1.0, 1.0))
+    return _SCALES.get(hint, (1.0, 1.0, 1.0))
 
 
 def generate_3d_world(world_data: Dict[str, Any], output_dir: str = "output") -> None:
@@ -61,7 +73,8 @@ def generate_3d_world(world_data: Dict[str, Any], output_dir: str = "output") ->
         world_data: World configuration from Tsuana
         output_dir: Directory to save all generated files
     """
-    os.makedirs(output_dir, exist_ok=True)
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
     
     world_plan = world_data["world_plan"]
     objects_config = world_data.get("objects", [])
@@ -93,7 +106,7 @@ def generate_3d_world(world_data: Dict[str, Any], output_dir: str = "output") ->
         try:
             # Generate 3D model
             model_filename = f"{obj_name.replace(' ', '_')}.glb"
-            model_path = os.path.join(output_dir, model_filename)
+            model_path = str(out / model_filename)
             
             result = generator.generate_from_text(
                 prompt=obj_description,
@@ -149,15 +162,12 @@ def generate_3d_world(world_data: Dict[str, Any], output_dir: str = "output") ->
     
     # Setup camera
     print("📷 Setting up camera...")
-    camera_desc = camera_config.get("position", "front view")
-    if "front" in camera_desc.lower():
-        composer.set_camera((0, 1.6, 10))
-    elif "top" in camera_desc.lower():
-        composer.set_camera((0, 15, 0))
-    elif "side" in camera_desc.lower():
-        composer.set_camera((10, 1.6, 0))
-    else:
-        composer.set_camera((5, 3, 8))
+    camera_desc = camera_config.get("position", "front view").lower()
+    camera_position = next(
+        (position for keyword, position in _CAMERA_PRESETS if keyword in camera_desc),
+        (5, 3, 8),
+    )
+    composer.set_camera(camera_position)
     
     # Setup environment
     print("🌍 Configuring environment...")
@@ -168,15 +178,15 @@ def generate_3d_world(world_data: Dict[str, Any], output_dir: str = "output") ->
     
     # Export scene data
     print("\n📄 Exporting scene files...")
-    scene_json_path = os.path.join(output_dir, "scene_data.json")
+    scene_json_path = str(out / "scene_data.json")
     composer.export_scene_data(scene_json_path)
     
     # Generate VR viewer (A-Frame HTML)
-    vr_html_path = os.path.join(output_dir, "vr_viewer.html")
+    vr_html_path = str(out / "vr_viewer.html")
     composer.generate_aframe_html(vr_html_path)
     
     # Generate Unity import script
-    unity_script_path = os.path.join(output_dir, "ImportScene.cs")
+    unity_script_path = str(out / "ImportScene.cs")
     composer.generate_unity_import_script(unity_script_path)
     
     # Save generation report
@@ -194,9 +204,8 @@ def generate_3d_world(world_data: Dict[str, Any], output_dir: str = "output") ->
         }
     }
     
-    report_path = os.path.join(output_dir, "generation_report.json")
-    with open(report_path, "w") as f:
-        json.dump(report, f, indent=2)
+    report_path = out / "generation_report.json"
+    report_path.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
     
     # Print summary
     print("\n" + "=" * 50)
@@ -233,6 +242,22 @@ def main():
     profile = UserProfile()
     last_target = None
 
+    # Scripted runs can pre-fill the profile as JSON; once complete, the first message
+    # goes straight to generation without clarification round-trips.
+    env_profile = SETTINGS.tsuana_profile
+    if env_profile:
+        try:
+            prefill = orjson.loads(env_profile)
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"Ignoring TSUANA_PROFILE: invalid JSON ({e})")
+            prefill = {}
+        if not isinstance(prefill, dict):
+            logger.warning("Ignoring TSUANA_PROFILE: expected a JSON object")
+            prefill = {}
+        for key, value in prefill.items():
+            if key in ALLOWED_FIELDS and isinstance(value, str) and profile.is_valid_value(value):
+                setattr(profile, key, value)
+
     while True:
         user_input = input("\n💬 You: ").strip()
 
@@ -257,7 +282,7 @@ def main():
         raw_response = call_tsuana(mode, user_input, profile.to_dict())
 
         try:
-            data = json.loads(raw_response)
+            data = orjson.loads(raw_response)
 
             # STEP 4 — Clarification
             if data["type"] == "question":
@@ -269,8 +294,7 @@ def main():
                 print("\n✅ World plan generated!")
                 
                 # Save full world data
-                with open("world_plan.json", "w") as f:
-                    json.dump(data, f, indent=2)
+                Path("world_plan.json").write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
                 
                 print("\n📋 World Plan Summary:")
                 world_plan = data["world_plan"]
@@ -299,7 +323,7 @@ def main():
                 print("\n❌ Unknown response type from Tsuana.")
                 break
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON parsing error: {e}")
             print(f"\n❌ Invalid response from Tsuana: {e}")
             break
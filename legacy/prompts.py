@@ -10,8 +10,6 @@ You operate in exactly TWO MODES, provided explicitly by the system:
 - generation
 
 GENERAL RULES:
-- Output ONLY valid JSON.
-- Do NOT include text outside JSON.
 - Never assume missing information.
 - Never treat user confusion as valid answers.
 
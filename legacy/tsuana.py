@@ -1,41 +1,155 @@
-import os
-import json
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from openai import OpenAI
-from dotenv import load_dotenv
+from config import SETTINGS
+from local_router import local_clarify
 from prompts import SYSTEM_PROMPT
 
-load_dotenv()
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 MODEL = "gpt-4o-mini"
+MAX_CONCURRENCY = SETTINGS.tsuana_concurrency
+
+# Identical on every turn, so it is built once and shared by reference.
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+
+def _strict_object(properties):
+    # Strict structured outputs need every property listed as required and no extras.
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+QUESTION_SCHEMA = _strict_object({
+    "type": {"type": "string", "enum": ["question"]},
+    "question": {"type": "string"},
+    "target_attribute": {"type": "string", "enum": ["mood", "environment", "style", "scale"]}
+})
+
+WORLD_SCHEMA = _strict_object({
+    "type": {"type": "string", "enum": ["final_prompt"]},
+    "world_plan": _strict_object({
+        "environment": {"type": "string"},
+        "mood": {"type": "string"},
+        "style": {"type": "string"},
+        "scale": {"type": "string"},
+        "description": {"type": "string"}
+    }),
+    "objects": {
+        "type": "array",
+        "items": _strict_object({
+            "name": {"type": "string"},
+            "description": {"type": "string"},
+            "position_hint": {
+                "type": "string",
+                "enum": ["center", "left", "right", "front", "back", "far_left", "far_right"]
+            },
+            "scale_hint": {"type": "string", "enum": ["small", "medium", "large"]}
+        })
+    },
+    "lighting": _strict_object({
+        "mood": {"type": "string", "enum": ["bright", "neutral", "dark", "warm", "cool"]},
+        "ambient_intensity": {"type": "number"},
+        "primary_light": {"type": "string"}
+    }),
+    "camera": _strict_object({
+        "position": {"type": "string"},
+        "target": {"type": "string"}
+    })
+})
+
+
+# (max_tokens, temperature) per mode: a clarification is one short, deterministic question,
+# while a world plan needs room for up to eight described objects and some variety.
+SAMPLING = {
+    "clarification": (120, 0.1),
+    "generation": (800, 0.4),
+}
+
+
+def response_format(mode):
+    """Structured-output format for a mode, so replies always parse as the expected JSON."""
+    if mode == "generation":
+        name, schema = "tsuana_final_prompt", WORLD_SCHEMA
+    else:
+        name, schema = "tsuana_question", QUESTION_SCHEMA
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": schema}
+    }
+
+
+@lru_cache(maxsize=1)
+def get_openai_client():
+    """Process-wide client; its httpx pool keeps the TLS connection to the API alive.
+
+    Never build a client per request, and never use client.with_options(): it returns a new
+    client with its own connection pool. Per-call headers or timeouts go on create() as
+    extra_headers= / timeout= instead.
+    """
+    return OpenAI(api_key=SETTINGS.openai_api_key)
+
+
+@lru_cache(maxsize=256)
+def _chat_reply(mode: str, user_content: str) -> str:
+    """Model reply for one serialized turn; an identical mode/profile/input reuses the first answer."""
+    max_tokens, temperature = SAMPLING.get(mode, SAMPLING["generation"])
+    response = get_openai_client().chat.completions.create(
+        model=MODEL,
+        messages=[
+            SYSTEM_MESSAGE,
+            {
+                "role": "user",
+                "content": user_content
+            }
+        ],
+        max_tokens=max_tokens,
+        temperature=temperature,
+        response_format=response_format(mode)
+    )
+
+    return response.choices[0].message.content.strip()
+
+
+def turn_payload(mode, user_input, profile_dict):
+    """Serialized user message for one Tsuana turn."""
+    return orjson.dumps({
+        "mode": mode,
+        "profile": profile_dict,
+        "user_input": user_input
+    }).decode()
 
 
 def call_tsuana(mode, user_input, profile_dict):
+    if mode == "clarification":
+        # Clarifications only depend on which attribute is still unset; the model is kept
+        # for generation and for the (unexpected) case where nothing is missing.
+        question = local_clarify(profile_dict)
+        if question is not None:
+            return question
+
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": SYSTEM_PROMPT
-                },
-                {
-                    "role": "user",
-                    "content": json.dumps({
-                        "mode": mode,
-                        "profile": profile_dict,
-                        "user_input": user_input
-                    })
-                }
-            ],
-            max_tokens=800,
-            temperature=0.4
-        )
-
-        return response.choices[0].message.content.strip()
+        # Failures raise out of the cached call, so error replies are never memoized.
+        return _chat_reply(mode, turn_payload(mode, user_input, profile_dict))
 
     except Exception as e:
-        return json.dumps({
+        return orjson.dumps({
             "type": "error",
             "message": str(e)
-        })
+        }).decode()
+
+
+def call_tsuana_many(items):
+    """Run several (mode, user_input, profile_dict) turns concurrently; results keep input order.
+
+    The OpenAI client is thread-safe and retries rate-limit errors with backoff itself, so a
+    bounded thread pool overlaps the round-trips without a separate throttle.
+    """
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENCY, len(items))) as pool:
+        return list(pool.map(lambda item: call_tsuana(*item), items))
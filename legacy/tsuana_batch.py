@@ -0,0 +1,93 @@
+"""Offline Tsuana turns through the OpenAI Batch API (half-price, 24h completion window)."""
+import time
+
+import orjson
+
+from tsuana import MODEL, SAMPLING, SYSTEM_MESSAGE, get_openai_client, response_format, turn_payload
+
+POLL_SECONDS = 30
+_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _request_line(custom_id, mode, user_input, profile_dict):
+    max_tokens, temperature = SAMPLING.get(mode, SAMPLING["generation"])
+    return orjson.dumps({
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": MODEL,
+            "messages": [
+                SYSTEM_MESSAGE,
+                {"role": "user", "content": turn_payload(mode, user_input, profile_dict)}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "response_format": response_format(mode)
+        }
+    })
+
+
+def enqueue_batch(items):
+    """Submit {custom_id: (mode, user_input, profile_dict)} as one batch and return its id."""
+    client = get_openai_client()
+    lines = b"\n".join(_request_line(custom_id, *turn) for custom_id, turn in items.items())
+    batch_file = client.files.create(file=("tsuana_batch.jsonl", lines), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    return batch.id
+
+
+def _error_reply(message):
+    return orjson.dumps({"type": "error", "message": message}).decode()
+
+
+def _record_reply(record):
+    """Reply for one output- or error-file record, in call_tsuana's shape."""
+    response = record.get("response") or {}
+    error = record.get("error")
+    if error or response.get("status_code") != 200:
+        body_error = (response.get("body") or {}).get("error") or {}
+        message = (error or {}).get("message") or body_error.get("message")
+        return _error_reply(message or f"HTTP {response.get('status_code')}")
+    return response["body"]["choices"][0]["message"]["content"].strip()
+
+
+def _file_lines(client, file_id):
+    if not file_id:
+        return []
+    return [line for line in client.files.content(file_id).content.splitlines() if line.strip()]
+
+
+def collect_batch(batch_id, poll_seconds=POLL_SECONDS, custom_ids=None):
+    """Wait for a batch to finish and yield (custom_id, reply) pairs.
+
+    Replies are the raw JSON strings call_tsuana would return. Requests the API wrote to the
+    batch's error file, and submitted ids missing from both files, get its error shape.
+    ``custom_ids`` defaults to the ids read back from the batch's input file.
+    """
+    client = get_openai_client()
+    batch = client.batches.retrieve(batch_id)
+    while batch.status not in _TERMINAL_STATUSES:
+        time.sleep(poll_seconds)
+        batch = client.batches.retrieve(batch_id)
+
+    if batch.status != "completed":
+        raise RuntimeError(f"Batch {batch_id} ended with status {batch.status}")
+
+    if custom_ids is None:
+        custom_ids = [orjson.loads(line)["custom_id"] for line in _file_lines(client, batch.input_file_id)]
+
+    seen = set()
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        for line in _file_lines(client, file_id):
+            record = orjson.loads(line)
+            seen.add(record["custom_id"])
+            yield record["custom_id"], _record_reply(record)
+
+    for custom_id in custom_ids:
+        if custom_id not in seen:
+            yield custom_id, _error_reply(f"No result for {custom_id} in batch {batch_id}")
@@ -4,9 +4,13 @@ Run this to verify your installation and API keys.
 """
 
 import os
+import re
 import sys
+from importlib.metadata import PackageNotFoundError, distribution
 from pathlib import Path
 
+_ENV_LINE = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)=(.*)$", re.MULTILINE)
+
 def check_python_version():
     """Verify Python version is 3.8+"""
     version = sys.version_info
@@ -18,24 +22,26 @@ def check_python_version():
 
 def check_dependencies():
     """Check if required packages are installed"""
-    required = {
-        "dotenv": "python-dotenv",
-        "requests": "requests",
-        "transformers": "transformers",
-        "torch": "torch",
-        "numpy": "numpy",
-        "trimesh": "trimesh",
-        "noise": "noise",
-        "shapely": "shapely",
-        "PIL": "pillow",
-    }
-
+    required = (
+        "python-dotenv",
+        "requests",
+        "orjson",
+        "transformers",
+        "torch",
+        "numpy",
+        "trimesh",
+        "shapely",
+        "pillow",
+    )
+
+    # Installed-distribution metadata is read by pip name without executing any package
+    # code, so heavy packages like torch cost no more to check than small ones.
     missing = []
-    for module, package in required.items():
+    for package in required:
         try:
-            __import__(module)
+            distribution(package)
             print(f"✅ {package} installed")
-        except ImportError:
+        except PackageNotFoundError:
             print(f"❌ {package} not installed")
             missing.append(package)
 
@@ -59,25 +65,17 @@ def check_env_file():
     required_keys = ["LOCAL_LLM_MODEL"]
     missing_keys = []
 
-    with open(env_path) as f:
-        content = f.read()
-        for key in required_keys:
-            if f"{key}=" in content:
-                value = [line for line in content.split("\n") if line.startswith(f"{key}=")]
-                if value:
-                    parts = value[0].split("=", 1)
-                    configured = len(parts) > 1 and parts[1].strip()
-                    if configured:
-                        print(f"✅ {key} configured")
-                    else:
-                        print(f"⚠️  {key} needs to be set")
-                        missing_keys.append(key)
-                else:
-                    print(f"⚠️  {key} needs to be set")
-                    missing_keys.append(key)
-            else:
-                print(f"❌ {key} missing")
-                missing_keys.append(key)
+    # One pass over the file builds a KEY -> value map; each required key is then a lookup.
+    env = dict(_ENV_LINE.findall(env_path.read_text()))
+    for key in required_keys:
+        if key not in env:
+            print(f"❌ {key} missing")
+            missing_keys.append(key)
+        elif env[key].strip():
+            print(f"✅ {key} configured")
+        else:
+            print(f"⚠️  {key} needs to be set")
+            missing_keys.append(key)
 
     if missing_keys:
         print(f"\n⚠️  Update these keys in .env:")
@@ -100,9 +98,19 @@ def check_project_structure():
         "README.md",
     ]
 
+    # One directory listing per parent folder instead of a stat() per file.
+    listings = {}
+    for parent in {os.path.dirname(file) or "." for file in required_files}:
+        try:
+            with os.scandir(parent) as entries:
+                listings[parent] = {entry.name for entry in entries}
+        except OSError:
+            listings[parent] = set()
+
     missing = []
     for file in required_files:
-        if Path(file).exists():
+        parent, name = os.path.split(file)
+        if name in listings[parent or "."]:
             print(f"✅ {file}")
         else:
             print(f"❌ {file} missing")
@@ -1,79 +1,146 @@
-"""Test Stability AI complete pipeline: Text → Image → 3D Model."""
+"""Test Stability AI complete pipeline: Text → Image → 3D Model.
+
+Extra object prompts can be passed as arguments; each object runs its own image → 3D chain
+concurrently, so the total time tracks the slowest object rather than the sum of all of them.
+"""
+import asyncio
 import os
+import sys
 from dotenv import load_dotenv
-import requests
+import anyio
+import httpx
 
 load_dotenv()
 
 STABILITY_API_KEY = os.getenv("STABILITY_API_KEY")
 STABILITY_IMAGE_BASE = "https://api.stability.ai/v2beta/stable-image/generate/core"
 STABILITY_3D_BASE = "https://api.stability.ai/v2beta/3d/stable-fast-3d"
+MAX_RETRIES = 3
+MAX_IN_FLIGHT = 5  # Stability rate limits are per key; keep concurrent objects bounded.
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+DEFAULT_PROMPTS = ["a simple wooden cube, isometric view, clean background"]
+OUTPUT_GLB = "test_stability_world.glb"
 
-def test_stability_pipeline():
-    """Test complete Stability AI pipeline."""
-    print("\n" + "=" * 60)
-    print("Testing Stability AI Pipeline: Text → Image → 3D")
-    print("=" * 60)
-    
-    if not STABILITY_API_KEY:
-        print("❌ STABILITY_API_KEY not found in .env file")
-        return False
-    
-    print(f"✅ API Key: {STABILITY_API_KEY[:10]}...{STABILITY_API_KEY[-4:]}")
-    
-    headers = {
-        "Authorization": f"Bearer {STABILITY_API_KEY}",
-        "Accept": "image/*"
-    }
-    
-    # Step 1: Text to Image
-    print("\n🎨 Step 1: Generating image from text...")
-    try:
-        response = requests.post(
+
+async def _post(client, url, **kwargs):
+    """POST with exponential backoff on rate limits and transient gateway errors."""
+    for attempt in range(MAX_RETRIES + 1):
+        response = await client.post(url, **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+        await asyncio.sleep(2 ** attempt)
+
+
+async def _post_to_file(client, url, path, **kwargs):
+    """Like _post, but a 200 body is streamed to ``path`` in chunks instead of held in memory."""
+    for attempt in range(MAX_RETRIES + 1):
+        async with client.stream("POST", url, **kwargs) as response:
+            if response.status_code == 200:
+                # File writes run in worker threads so they don't stall the other downloads.
+                async with await anyio.open_file(path, "wb") as f:
+                    async for chunk in response.aiter_bytes(chunk_size=1 << 20):
+                        await f.write(chunk)
+                return response
+            await response.aread()
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+        await asyncio.sleep(2 ** attempt)
+
+
+def _output_path(index):
+    if index == 0:
+        return OUTPUT_GLB
+    stem, ext = os.path.splitext(OUTPUT_GLB)
+    return f"{stem}_{index}{ext}"
+
+
+async def run_object(client, semaphore, index, prompt):
+    """Run one prompt through image → 3D; its 3D call starts as soon as its own image lands."""
+    tag = f"[{index}]"
+    async with semaphore:
+        print(f"\n🎨 {tag} Generating image: {prompt}")
+        response = await _post(
+            client,
             STABILITY_IMAGE_BASE,
-            headers=headers,
+            headers={
+                "Authorization": f"Bearer {STABILITY_API_KEY}",
+                "Accept": "image/*"
+            },
             files={"none": ""},
             data={
-                "prompt": "a simple wooden cube, isometric view, clean background",
+                "prompt": prompt,
                 "aspect_ratio": "1:1",
                 "output_format": "png"
             },
             timeout=30
         )
-        
-        if response.status_code == 200:
-            image_bytes = response.content
-            print(f"✅ Image: {len(image_bytes) / 1024:.2f} KB")
-            
-            # Step 2: Image to 3D
-            print("\n🌍 Step 2: Converting to 3D (2048px, quad mesh)...")
-            response_3d = requests.post(
-                STABILITY_3D_BASE,
-                headers={"Authorization": f"Bearer {STABILITY_API_KEY}"},
-                files={"image": ("image.png", image_bytes, "image/png")},
-                data={"texture_resolution": "2048", "foreground_ratio": "0.85", "remesh": "quad"},
-                timeout=60
-            )
-            
-            if response_3d.status_code == 200:
-                print(f"\n✅ SUCCESS! Pipeline working!")
-                print(f"📦 GLB: {len(response_3d.content) / 1024:.2f} KB")
-                with open("test_stability_world.glb", "wb") as f:
-                    f.write(response_3d.content)
-                print(f"💾 Saved: test_stability_world.glb")
-                return True
-            else:
-                print(f"\n❌ 3D Failed: {response_3d.status_code}")
-                print(response_3d.text[:500])
-                return False
-        else:
-            print(f"\n❌ Image Failed: {response.status_code}")
+        if response.status_code != 200:
+            print(f"\n❌ {tag} Image Failed: {response.status_code}")
             print(response.text[:500])
             return False
-    except Exception as e:
-        print(f"\n❌ Error: {e}")
+
+        image_bytes = response.content
+        print(f"✅ {tag} Image: {len(image_bytes) / 1024:.2f} KB")
+
+        print(f"\n🌍 {tag} Converting to 3D (2048px, quad mesh)...")
+        output_path = _output_path(index)
+        response_3d = await _post_to_file(
+            client,
+            STABILITY_3D_BASE,
+            output_path,
+            headers={"Authorization": f"Bearer {STABILITY_API_KEY}"},
+            files={"image": ("image.png", image_bytes, "image/png")},
+            data={"texture_resolution": "2048", "foreground_ratio": "0.85", "remesh": "quad"},
+            timeout=60
+        )
+        if response_3d.status_code != 200:
+            print(f"\n❌ {tag} 3D Failed: {response_3d.status_code}")
+            print(response_3d.text[:500])
+            return False
+
+        print(f"📦 {tag} GLB: {os.path.getsize(output_path) / 1024:.2f} KB")
+        print(f"💾 {tag} Saved: {output_path}")
+        return True
+
+
+async def _run_pipeline(prompts):
+    semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+    # One pool for every object: all calls share keep-alive connections to api.stability.ai.
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(60),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+        transport=httpx.AsyncHTTPTransport(retries=MAX_RETRIES),
+    ) as client:
+        return await asyncio.gather(
+            *(run_object(client, semaphore, i, prompt) for i, prompt in enumerate(prompts)),
+            return_exceptions=True
+        )
+
+
+def test_stability_pipeline(prompts=None):
+    """Test complete Stability AI pipeline."""
+    print("\n" + "=" * 60)
+    print("Testing Stability AI Pipeline: Text → Image → 3D")
+    print("=" * 60)
+
+    if not STABILITY_API_KEY:
+        print("❌ STABILITY_API_KEY not found in .env file")
         return False
 
+    print(f"✅ API Key: {STABILITY_API_KEY[:10]}...{STABILITY_API_KEY[-4:]}")
+
+    results = asyncio.run(_run_pipeline(prompts or DEFAULT_PROMPTS))
+    for index, result in enumerate(results):
+        if isinstance(result, Exception):
+            print(f"\n❌ [{index}] Error: {result}")
+
+    ok = sum(result is True for result in results)
+    if ok == len(results):
+        print(f"\n✅ SUCCESS! Pipeline working! ({ok} object(s))")
+        return True
+    print(f"\n⚠️  {ok}/{len(results)} object(s) completed")
+    return False
+
 
 if __name__ == "__main__":
-    test_stability_pipeline()
+    test_stability_pipeline(sys.argv[1:])
@@ -0,0 +1,50 @@
+"""LocalLLMClient helpers that run without a model: host parsing and prompt tokenization."""
+from types import SimpleNamespace
+
+import pytest
+
+from app.ai_client import LocalLLMClient, _PendingChat, _ollama_base_url
+
+
+@pytest.mark.parametrize(
+    ("host", "expected"),
+    [
+        ("127.0.0.1:11434", "http://127.0.0.1:11434"),
+        ("0.0.0.0:11434", "http://localhost:11434"),
+        ("0.0.0.0", "http://localhost:11434"),
+        ("http://localhost:11434/", "http://localhost:11434"),
+        ("https://ollama.example.com", "https://ollama.example.com"),
+        ("http://[::1]:11434", "http://[::1]:11434"),
+    ],
+)
+def test_ollama_base_url(host, expected):
+    assert _ollama_base_url(host) == expected
+
+
+class _CharTokenizer:
+    """Character-level stand-in; ``dummy_prefix`` mimics SentencePiece's leading ``▁``."""
+
+    def __init__(self, dummy_prefix):
+        self.dummy_prefix = dummy_prefix
+
+    def __call__(self, text, add_special_tokens=True):
+        ids = [1] if add_special_tokens else []
+        if self.dummy_prefix and text:
+            ids.append(2)
+        ids.extend(ord(char) for char in text)
+        return SimpleNamespace(input_ids=ids)
+
+
+@pytest.mark.parametrize("dummy_prefix", [False, True])
+@pytest.mark.parametrize("json_mode", [False, True])
+def test_split_prompt_ids_match_unsplit_tokenization(dummy_prefix, json_mode):
+    client = LocalLLMClient()
+    client._tokenizer = _CharTokenizer(dummy_prefix)
+    messages = [
+        {"role": "system", "content": "You are a world architect."},
+        {"role": "user", "content": '{"biome": "forest"}'},
+    ]
+    request = _PendingChat(prompt=client._split_prompt(messages), max_tokens=8, json_mode=json_mode)
+
+    expected = client._tokenizer(LocalLLMClient._format_messages(messages) + ("{" if json_mode else "")).input_ids
+    assert client._encode_prompt(request) == expected
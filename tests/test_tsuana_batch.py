@@ -0,0 +1,86 @@
+"""collect_batch against a stubbed OpenAI client."""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("dotenv")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "legacy"))
+
+import tsuana_batch  # noqa: E402
+
+
+def _jsonl(*records):
+    return b"\n".join(orjson.dumps(record) for record in records) + b"\n"
+
+
+def _ok(custom_id, content):
+    return {
+        "custom_id": custom_id,
+        "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}},
+        "error": None,
+    }
+
+
+class _StubClient:
+    def __init__(self, batch, files):
+        self.batches = SimpleNamespace(retrieve=lambda batch_id: batch)
+        self.files = SimpleNamespace(content=lambda file_id: SimpleNamespace(content=files[file_id]))
+
+
+def _client(monkeypatch, output_file_id, error_file_id, files):
+    batch = SimpleNamespace(
+        status="completed",
+        input_file_id="in",
+        output_file_id=output_file_id,
+        error_file_id=error_file_id,
+    )
+    files["in"] = _jsonl(*({"custom_id": cid} for cid in ("a", "b", "c", "d")))
+    monkeypatch.setattr(tsuana_batch, "get_openai_client", lambda: _StubClient(batch, files))
+
+
+def test_mixed_batch_yields_replies_and_errors(monkeypatch):
+    _client(monkeypatch, "out", "err", {
+        "out": _jsonl(
+            _ok("a", ' {"type": "question"} '),
+            {"custom_id": "b", "response": {"status_code": 500, "body": {}}, "error": None},
+        ),
+        "err": _jsonl({
+            "custom_id": "c",
+            "response": {"status_code": 400, "body": {"error": {"message": "bad request"}}},
+            "error": None,
+        }),
+    })
+
+    replies = dict(tsuana_batch.collect_batch("batch_1", poll_seconds=0))
+
+    assert replies["a"] == '{"type": "question"}'
+    assert orjson.loads(replies["b"]) == {"type": "error", "message": "HTTP 500"}
+    assert orjson.loads(replies["c"]) == {"type": "error", "message": "bad request"}
+    assert orjson.loads(replies["d"])["type"] == "error"
+
+
+def test_all_failed_batch_without_output_file(monkeypatch):
+    _client(monkeypatch, None, "err", {
+        "err": _jsonl(*(
+            {"custom_id": cid, "response": None, "error": {"message": "quota"}}
+            for cid in ("a", "b", "c", "d")
+        )),
+    })
+
+    replies = dict(tsuana_batch.collect_batch("batch_1", poll_seconds=0))
+
+    assert sorted(replies) == ["a", "b", "c", "d"]
+    assert all(orjson.loads(reply) == {"type": "error", "message": "quota"} for reply in replies.values())
+
+
+def test_failed_batch_raises(monkeypatch):
+    batch = SimpleNamespace(status="expired")
+    monkeypatch.setattr(tsuana_batch, "get_openai_client", lambda: _StubClient(batch, {}))
+
+    with pytest.raises(RuntimeError):
+        list(tsuana_batch.collect_batch("batch_1", poll_seconds=0))
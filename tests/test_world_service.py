@@ -0,0 +1,21 @@
+"""The constructed fallback schema must pass its own validation."""
+import pytest
+
+from app.schemas import WorldDesignSpec, WorldSchema
+from app.world_service import _fallback_schema
+
+
+@pytest.mark.parametrize("scale_km", [0.11, 1.0, 30.0, 70.0, 120.0, 200.0])
+@pytest.mark.parametrize("time_of_day", ["noon", "night"])
+def test_fallback_schema_is_valid(scale_km, time_of_day):
+    design = WorldDesignSpec(
+        biome="forest",
+        terrain_type="hills",
+        scale_km=scale_km,
+        sky_weather="clear",
+        mood="calm",
+        time_of_day=time_of_day,
+    )
+    schema = _fallback_schema(design, seed=7)
+
+    assert WorldSchema.model_validate(schema.model_dump()) == schema